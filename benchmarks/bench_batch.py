@@ -0,0 +1,55 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 21:10:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 21:10:00
+'''
+
+
+import numpy as np
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.push.interpreter import PushInterpreter
+
+from utils import evolved_individuals, random_individuals, get_problem, best_time
+
+
+def check_outputs(programs, cases):
+    """Assert that batched and serial runs produce byte-identical outputs, with and without resets."""
+    for reset_on_run in [True, False]:
+        serial_interpreter = PushInterpreter(reset_on_run=reset_on_run)
+        batch_interpreter = PushInterpreter(reset_on_run=reset_on_run)
+        for program in programs:
+            serial = [serial_interpreter.run(program, inputs) for inputs, _ in cases]
+            batched = batch_interpreter.run_batch(program, [inputs for inputs, _ in cases])
+            assert repr(serial).encode() == repr(batched).encode()
+            assert [type(v) for o in serial for v in o] == [type(v) for o in batched for v in o]
+    print("Outputs of {n} programs identical on {c} cases.".format(n=len(programs), c=len(cases)))
+
+
+def main(n_random: int = 200):
+    for name in ["number-io", "replace-space-with-newline"]:
+        np.random.seed(0)
+        X, y, individuals = evolved_individuals(name)
+        _, _, spawner, signature = get_problem(name)
+        for label, population in [("evolved", individuals),
+                                  ("random", random_individuals(spawner, signature, n_random))]:
+            programs = [i.program for i in population]
+            serial = DatasetEvaluator(X, y, batch_cases=False)
+            batched = DatasetEvaluator(X, y, batch_cases=True)
+            check_outputs(programs, serial.cases)
+            for program in programs:
+                assert serial.evaluate(program).tobytes() == batched.evaluate(program).tobytes()
+            before = best_time(lambda: [serial.evaluate(p) for p in programs])
+            after = best_time(lambda: [batched.evaluate(p) for p in programs])
+            print("{nm}, {lb}: {b:.1f} -> {a:.1f} evaluations/second ({s:.2f}x)".format(
+                nm=name,
+                lb=label,
+                b=len(programs) / before,
+                a=len(programs) / after,
+                s=before / after
+            ))
+
+
+if __name__ == "__main__":
+    main()
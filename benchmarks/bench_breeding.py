@@ -0,0 +1,121 @@
+'''
+Author: He,Yifan
+Date: 2026-10-19 02:10:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-19 02:10:00
+'''
+
+
+import os
+import pickle
+import time
+
+import numpy as np
+
+from pgsyn.gp.algorithms.umad import UMAD
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.gp.genome import GeneSpawner
+
+from utils import get_problem
+
+
+def _without_code_printing(spawner: GeneSpawner) -> GeneSpawner:
+    # Printed code shows the addresses of PushType objects, which differ between processes.
+    instruction_set = spawner.instruction_set
+    for name in ["print_exec", "println_exec", "print_code", "println_code"]:
+        if name in instruction_set:
+            instruction_set.unregister(name)
+    return GeneSpawner(spawner.n_inputs, instruction_set, spawner.literals, spawner.erc_generators)
+
+
+def make_search(name: str, parallel_breeding: bool, seed: int = 0, deterministic: bool = False, **kwargs) -> UMAD:
+    np.random.seed(seed)
+    X, y, spawner, signature = get_problem(name)
+    if deterministic:
+        spawner = _without_code_printing(spawner)
+    return UMAD(
+        signature=signature,
+        evaluator=DatasetEvaluator(X, y),
+        spawner=spawner,
+        population_size=kwargs.pop("population_size", 500),
+        initial_genome_size=(50, 200),
+        parallelism=kwargs.pop("parallelism", max(2, os.cpu_count())),
+        parallel_breeding=parallel_breeding,
+        **kwargs
+    )
+
+
+def run_generations(search: UMAD, n_generations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n_generations):
+        search._full_step()
+    return time.perf_counter() - start
+
+
+def check_runs(name: str, n_generations: int = 3):
+    """Assert that parallel breeding is reproducible and evaluates children correctly."""
+    populations = []
+    for _ in range(2):
+        search = make_search(name, True, deterministic=True, population_size=100)
+        run_generations(search, n_generations)
+        # The last step bred an evaluated population.
+        assert len(search.population.unevaluated) == 0
+        populations.append(search.population)
+        evaluator = search.evaluator
+        for individual in search.population:
+            assert np.array_equal(individual.error_vector, evaluator.evaluate(individual.program))
+        search.tear_down()
+    assert [i.genome for i in populations[0]] == [i.genome for i in populations[1]]
+    assert [i.total_error for i in populations[0]] == [i.total_error for i in populations[1]]
+
+    # Workers used to start from the same random state and spawn the same genomes.
+    search = make_search(name, True, deterministic=True, population_size=100)
+    genomes = {pickle.dumps(i.genome) for i in search.population}
+    assert len(genomes) == len(search.population), len(genomes)
+    search.tear_down()
+
+    # Children are evaluated on the cases sampled for their generation.
+    search = make_search(name, True, deterministic=True, population_size=100, selection="downsampled-lexicase")
+    run_generations(search, n_generations)
+    for individual in search.population:
+        assert len(individual.error_vector) < search.evaluator.n_cases * len(search.evaluator.output_kinds)
+    search.tear_down()
+
+    # With a cache, children are bred and evaluated in one task, and cached programs are not evaluated again.
+    search = make_search(name, True, deterministic=True, population_size=100, evaluation_cache_size=1000)
+    run_generations(search, n_generations)
+    assert len(search.population.unevaluated) == 0
+    cache = search.evaluation_cache
+    lookups = cache.hits + cache.misses
+    assert lookups == (n_generations + 1) * search.population_size, lookups
+    assert len(cache) <= cache.misses
+    for individual in search.population:
+        assert np.array_equal(individual.error_vector, search.evaluator.evaluate(individual.program))
+    search.tear_down()
+
+    # Without mutation, every child is a clone of a parent and its error vector comes from the cache.
+    search = make_search(name, True, deterministic=True, population_size=100, evaluation_cache_size=1000,
+                         addition_rate=0.0, deletion_rate=0.0)
+    run_generations(search, n_generations)
+    cache = search.evaluation_cache
+    assert cache.hits == n_generations * search.population_size, cache.hits
+    search.tear_down()
+    print("{nm}: parallel breeding is reproducible and its error vectors are correct.".format(nm=name))
+
+
+def main(n_generations: int = 5):
+    for name in ["number-io", "replace-space-with-newline"]:
+        check_runs(name)
+        for parallel_breeding in [False, True]:
+            search = make_search(name, parallel_breeding)
+            search._full_step()
+            t = run_generations(search, n_generations)
+            print("{nm}, parallel_breeding={pb}: {n} generations of {ps} in {t:.2f}s with {np} processes".format(
+                nm=name, pb=parallel_breeding, n=n_generations, ps=search.population_size, t=t,
+                np=search._p_context.n_proc
+            ))
+            search.tear_down()
+
+
+if __name__ == "__main__":
+    main()
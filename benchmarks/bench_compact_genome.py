@@ -0,0 +1,135 @@
+'''
+Author: He,Yifan
+Date: 2026-10-19 00:10:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-19 00:10:00
+'''
+
+
+from multiprocessing import Pool
+import pickle
+import tracemalloc
+
+import numpy as np
+
+from pgsyn.gp.genome import Genome, CompactGenome, genome_to_code
+from pgsyn.gp.variation import VariationPipeline, AdditionMutation, DeletionMutation, UMADMutation
+
+from utils import get_problem, best_time
+
+
+_spawner = None
+
+
+def _init(spawner):
+    global _spawner
+    _spawner = spawner
+
+
+def _spawn_in_worker(size):
+    genome = _spawner.spawn_genome(size, compact=True)
+    return genome, genome.to_genome()
+
+
+def check_equivalence(spawner, n_genomes: int = 500, max_size: int = 300):
+    """Assert that compact genomes hold the same genes and translate to the same code."""
+    table = spawner.gene_table
+    for _ in range(n_genomes):
+        genome = spawner.spawn_genome((0, max_size))
+        compact = table.encode(genome)
+        assert compact.to_genome() == genome
+        assert genome_to_code(compact) == genome_to_code(genome)
+        assert pickle.loads(pickle.dumps(compact)) == compact
+    # ERC genes spawned in a worker get codes local to the worker.
+    with Pool(2, initializer=_init, initargs=(spawner,)) as pool:
+        for compact, genome in pool.map(_spawn_in_worker, [max_size] * 20):
+            assert compact.to_genome() == genome
+            assert genome_to_code(compact) == genome_to_code(genome)
+    print("{n} genomes encoded, translated and pickled identically.".format(n=n_genomes))
+
+
+def check_variation(spawner, n_children: int = 300, size: int = 200):
+    """Assert that, with the same seed, variation gives the same children for both representations."""
+    for op in [VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.0826)]), UMADMutation(0.09, 0.0826)]:
+        np.random.seed(2)
+        parent = spawner.spawn_genome(size)
+        compact_parent = spawner.gene_table.encode(parent)
+        state = np.random.get_state()
+        children = [op.produce([parent], spawner, max_genome_size=size) for _ in range(n_children)]
+        np.random.set_state(state)
+        compact_children = [op.produce([compact_parent], spawner, max_genome_size=size) for _ in range(n_children)]
+        for child, compact_child in zip(children, compact_children):
+            assert isinstance(compact_child, CompactGenome)
+            assert compact_child.to_genome() == Genome(child)
+    print("Variation produced identical children.")
+
+
+def check_free_unused(spawner, n_genomes: int = 200, size: int = 200):
+    """Assert that freeing unused codes keeps the codes of live genomes and reuses the freed codes."""
+    table = spawner.gene_table
+    table.free_unused()
+    compacts = [spawner.spawn_genome(size, compact=True) for _ in range(n_genomes)]
+    survivors = compacts[::2] + [c[10:50] for c in compacts[1::4]]
+    genomes = [c.to_genome() for c in survivors]
+    codes = [c.genes.tobytes() for c in survivors]
+    hashes = [hash(c) for c in survivors]
+    del compacts
+    n_freed = table.free_unused()
+    assert n_freed > 0
+    # New genes take the freed codes.
+    grown, n_free = len(table), len(table._free)
+    newcomers = [spawner.spawn_genome(size, compact=True) for _ in range(10)]
+    assert len(table) == grown and len(table._free) < n_free
+    for compact, genome, code, h in zip(survivors, genomes, codes, hashes):
+        assert compact.genes.tobytes() == code and hash(compact) == h
+        assert compact.to_genome() == genome
+        assert genome_to_code(compact) == genome_to_code(genome)
+    assert table.encode(genomes[0]) == survivors[0]
+    del survivors, newcomers, compact
+    table.free_unused()
+    assert len(table) - len(table._free) == table.n_fixed
+    print("Freed {n} of {g} codes, kept the codes of live genomes and reused the freed codes.".format(
+        n=n_freed, g=grown
+    ))
+
+
+def allocated(fn):
+    """Return the result of ``fn`` and the bytes it left allocated."""
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(n_genomes: int = 1000, size: int = 400):
+    np.random.seed(0)
+    _, _, spawner, _ = get_problem("replace-space-with-newline")
+    check_equivalence(spawner)
+    check_variation(spawner)
+    check_free_unused(spawner)
+
+    # Genomes share the interned Atoms of the spawner, so the baseline is a Genome of interned Atoms.
+    np.random.seed(1)
+    genomes, genome_bytes = allocated(lambda: [spawner.spawn_genome(size) for _ in range(n_genomes)])
+    np.random.seed(1)
+    compacts, compact_bytes = allocated(lambda: [spawner.spawn_genome(size, compact=True) for _ in range(n_genomes)])
+    print("memory of {n} genomes of {sz} genes: Genome {a:.1f} MB, CompactGenome {b:.1f} MB ({r:.1f}x)".format(
+        n=n_genomes, sz=size, a=genome_bytes / 1e6, b=compact_bytes / 1e6, r=genome_bytes / compact_bytes
+    ))
+    genome_pickle = sum(len(pickle.dumps(gn)) for gn in genomes)
+    compact_pickle = sum(len(pickle.dumps(gn)) for gn in compacts)
+    print("pickled size: Genome {a:.1f} MB, CompactGenome {b:.1f} MB ({r:.1f}x)".format(
+        a=genome_pickle / 1e6, b=compact_pickle / 1e6, r=genome_pickle / compact_pickle
+    ))
+    # What sending the genomes to a worker and back costs, apart from the transfer itself.
+    for label, population in [("Genome", genomes), ("CompactGenome", compacts)]:
+        t = best_time(lambda: [pickle.loads(pickle.dumps(gn)) for gn in population])
+        print("pickle round trip, {lb}: {t:.3f}s".format(lb=label, t=t))
+    for label, population in [("Genome", genomes), ("CompactGenome", compacts)]:
+        t = best_time(lambda: [genome_to_code(gn) for gn in population])
+        print("genome_to_code, {lb}: {t:.3f}s".format(lb=label, t=t))
+
+
+if __name__ == "__main__":
+    main()
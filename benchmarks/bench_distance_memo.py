@@ -0,0 +1,62 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 22:20:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 22:20:00
+'''
+
+
+import numpy as np
+import pandas as pd
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.push.program import ProgramSignature
+from pgsyn.push.types import Char
+
+from utils import evolved_individuals, get_problem, random_individuals, best_time
+
+
+def check_char_outputs(n_programs: int = 200):
+    """Assert the memo gives the same errors as no memo on a Char output column."""
+    X, _, spawner, signature = get_problem("replace-space-with-newline")
+    y = pd.DataFrame({"output1": [Char(s[0]) for s in X["input1"]]})
+    signature = ProgramSignature(arity=1, output_stacks=["char"], push_config=signature.push_config)
+    programs = [i.program for i in random_individuals(spawner, signature, n_programs)]
+    for batch_cases in [True, False]:
+        plain = DatasetEvaluator(X, y, batch_cases=batch_cases, distance_memo_size=0)
+        memoized = DatasetEvaluator(X, y, batch_cases=batch_cases)
+        for program in programs:
+            assert plain.evaluate(program).tobytes() == memoized.evaluate(program).tobytes()
+    print("Char outputs: errors identical with and without the memo on {n} programs.".format(n=n_programs))
+
+
+def main():
+    np.random.seed(0)
+    check_char_outputs()
+    for name in ["number-io", "replace-space-with-newline"]:
+        np.random.seed(0)
+        X, y, individuals = evolved_individuals(name)
+        programs = [i.program for i in individuals]
+        plain = DatasetEvaluator(X, y, distance_memo_size=0)
+        memoized = DatasetEvaluator(X, y)
+        for program in programs:
+            assert plain.evaluate(program).tobytes() == memoized.evaluate(program).tobytes()
+        memo = memoized.distance_memo
+        print("{nm}: memo hit rate {r:.3f} over one generation ({s} distinct pairs)".format(
+            nm=name,
+            r=memo.hit_rate(),
+            s=len(memo)
+        ))
+        # Each timed pass starts from an empty memo, like the first generation of a run.
+        before = best_time(lambda: [plain.evaluate(p) for p in programs])
+        after = best_time(lambda: (memo.clear(), [memoized.evaluate(p) for p in programs]))
+        print("{nm}: {b:.1f} -> {a:.1f} evaluations/second ({s:.2f}x)".format(
+            nm=name,
+            b=len(programs) / before,
+            a=len(programs) / after,
+            s=before / after
+        ))
+
+
+if __name__ == "__main__":
+    main()
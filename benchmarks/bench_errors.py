@@ -0,0 +1,68 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 21:40:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 21:40:00
+'''
+
+
+import numpy as np
+import pandas as pd
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.utils import Token
+
+from utils import best_time
+
+
+def random_dataset(n_cases: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "bool": np.random.random(n_cases) < 0.5,
+        "int": np.random.randint(-100, 100, n_cases),
+        "float": np.random.uniform(-100, 100, n_cases),
+        "str": np.random.choice(["hello world", "hello\\nworld", "", "a b c"], n_cases),
+    })
+
+
+def random_output(column: str):
+    if np.random.random() < 0.1:
+        return Token.no_stack_item
+    if column == "bool":
+        return bool(np.random.random() < 0.5)
+    elif column == "int":
+        return int(np.random.randint(-100, 100))
+    elif column == "float":
+        return np.random.choice([float(np.random.uniform(-100, 100)), np.inf, np.nan, 1e12])
+    return str(np.random.choice(["hello world", "hello\\nworld", "", "a b c", 7]))
+
+
+def per_case_errors(evaluator: DatasetEvaluator, outputs):
+    # Errors prior to the column-typed engine: one call per case.
+    errors = [evaluator.default_error_function(actual, expected)
+              for actual, (_, expected) in zip(outputs, evaluator.cases)]
+    return np.array(errors).flatten()
+
+
+def main(n_cases: int = 200, n_programs: int = 100):
+    np.random.seed(0)
+    y = random_dataset(n_cases)
+    X = pd.DataFrame({"x": range(n_cases)})
+    for columns in [["bool"], ["int"], ["float"], ["int", "float", "bool"], ["str"], ["int", "str"]]:
+        evaluator = DatasetEvaluator(X, y[columns])
+        all_outputs = [[[random_output(c) for c in columns] for _ in range(n_cases)] for _ in range(n_programs)]
+        for outputs in all_outputs:
+            before = per_case_errors(evaluator, outputs)
+            after = evaluator.batch_errors(outputs)
+            assert before.dtype == after.dtype and before.tobytes() == after.tobytes()
+        before = best_time(lambda: [per_case_errors(evaluator, o) for o in all_outputs])
+        after = best_time(lambda: [evaluator.batch_errors(o) for o in all_outputs])
+        print("{cols}: {b:.1f} -> {a:.1f} us/program ({s:.1f}x), identical errors".format(
+            cols=columns,
+            b=1e6 * before / n_programs,
+            a=1e6 * after / n_programs,
+            s=before / after
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 16:20:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 16:20:00
+'''
+
+
+import numpy as np
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+
+from utils import get_problem, random_individuals, best_time
+
+
+def _evaluate_with_iloc(evaluator: DatasetEvaluator, program):
+    # Evaluation loop prior to the pre-materialized case table.
+    errors = []
+    for ndx in range(evaluator.X.shape[0]):
+        inputs = evaluator.X.iloc[ndx].to_list()
+        expected = evaluator.y.iloc[ndx].to_list()
+        actual = evaluator.interpreter.run(program, inputs)
+        errors.append(evaluator.default_error_function(actual, expected))
+    return np.array(errors).flatten()
+
+
+def _iloc_rows(evaluator: DatasetEvaluator):
+    for ndx in range(evaluator.X.shape[0]):
+        evaluator.X.iloc[ndx].to_list()
+        evaluator.y.iloc[ndx].to_list()
+
+
+def _table_rows(evaluator: DatasetEvaluator):
+    for inputs, expected in evaluator.cases:
+        pass
+
+
+def main(n_programs: int = 100):
+    for name in ["number-io", "replace-space-with-newline"]:
+        np.random.seed(0)
+        X, y, spawner, signature = get_problem(name)
+        evaluator = DatasetEvaluator(X, y)
+        programs = [i.program for i in random_individuals(spawner, signature, n_programs)]
+
+        before = best_time(lambda: [_evaluate_with_iloc(evaluator, p) for p in programs])
+        after = best_time(lambda: [evaluator.evaluate(p) for p in programs])
+        print("{nm}: {b:.1f} -> {a:.1f} evaluations/second ({s:.2f}x)".format(
+            nm=name,
+            b=n_programs / before,
+            a=n_programs / after,
+            s=before / after
+        ))
+        before = best_time(lambda: [_iloc_rows(evaluator) for _ in range(n_programs)])
+        after = best_time(lambda: [_table_rows(evaluator) for _ in range(n_programs)])
+        print("{nm}: case access only {b:.3f}s -> {a:.5f}s per {n} programs".format(
+            nm=name,
+            b=before,
+            a=after,
+            n=n_programs
+        ))
+
+
+if __name__ == "__main__":
+    main()
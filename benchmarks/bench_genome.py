@@ -0,0 +1,79 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 19:20:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 19:20:00
+'''
+
+
+import numpy as np
+from pyrsistent import l
+
+from pgsyn.gp.genome import Genome, Opener, genome_to_code
+from pgsyn.push.atoms import CodeBlock, Closer, InstructionMeta
+
+from utils import get_problem, best_time
+
+
+def _has_opener(seq) -> bool:
+    for el in seq:
+        if isinstance(el, Opener):
+            return True
+    return False
+
+
+def _legacy_genome_to_code(genome: Genome) -> CodeBlock:
+    # Translation prior to the open-block stack: quadratic in genome length.
+    plushy_buffer = l()
+    for atom in genome[::-1]:
+        if isinstance(atom, InstructionMeta) and atom.code_blocks > 0:
+            plushy_buffer = plushy_buffer.cons(Opener(count=atom.code_blocks))
+        plushy_buffer = plushy_buffer.cons(atom)
+
+    push_buffer = []
+    while True:
+        if len(plushy_buffer) == 0 and _has_opener(push_buffer):
+            plushy_buffer = plushy_buffer.cons(Closer())
+        elif len(plushy_buffer) == 0:
+            return CodeBlock(push_buffer)
+        else:
+            atom = plushy_buffer.first
+            plushy_buffer = plushy_buffer.rest
+            if isinstance(atom, Closer) and _has_opener(push_buffer):
+                ndx, opener = [(ndx, el) for ndx, el in enumerate(push_buffer) if isinstance(el, Opener)][-1]
+                post_open = push_buffer[ndx + 1:]
+                pre_open = push_buffer[:ndx]
+                push_buffer = pre_open + [CodeBlock(post_open)]
+                if opener.count > 1:
+                    opener = opener.dec()
+                    push_buffer.append(opener)
+            elif not isinstance(atom, Closer):
+                push_buffer.append(atom)
+
+
+def check_equivalence(spawner, n_genomes: int = 2000, max_size: int = 300):
+    """Assert that both translations agree on random genomes."""
+    for _ in range(n_genomes):
+        genome = spawner.spawn_genome((0, max_size))
+        assert genome_to_code(genome) == _legacy_genome_to_code(genome), genome
+    print("{n} random genomes translated identically.".format(n=n_genomes))
+
+
+def main(n_genomes: int = 20):
+    np.random.seed(0)
+    _, _, spawner, _ = get_problem("replace-space-with-newline")
+    check_equivalence(spawner)
+    for size in [10, 50, 100, 200, 500, 1000, 2000]:
+        genomes = [spawner.spawn_genome(size) for _ in range(n_genomes)]
+        legacy = best_time(lambda: [_legacy_genome_to_code(g) for g in genomes])
+        stack = best_time(lambda: [genome_to_code(g) for g in genomes])
+        print("genome size {sz}: {b:.3f} -> {a:.3f} ms/genome ({s:.1f}x)".format(
+            sz=size,
+            b=1000 * legacy / n_genomes,
+            a=1000 * stack / n_genomes,
+            s=legacy / stack
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+'''
+Author: He,Yifan
+Date: 2026-10-19 01:30:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-19 01:30:00
+'''
+
+
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+import yaml
+
+from pgsyn.gp.genome import Genome
+from pgsyn.knowledge.base import from_yaml
+from pgsyn.push.atoms import Closer, Input, InstructionMeta, Literal
+from pgsyn.push.instructions import core_instructions
+from pgsyn.push.type_library import PushTypeLibrary
+from pgsyn.yaml_utils import register_yaml_constructors
+
+from utils import get_problem
+
+
+def _fresh(atom):
+    # Genes as they were spawned before interning: a new object per gene.
+    if isinstance(atom, Closer):
+        return Closer()
+    if isinstance(atom, InstructionMeta):
+        return InstructionMeta(name=atom.name, code_blocks=atom.code_blocks)
+    if isinstance(atom, Input):
+        return Input(input_index=atom.input_index)
+    return atom
+
+
+class LegacyLoader(yaml.UnsafeLoader):
+    """Loads genes with the constructors prior to interning."""
+
+
+def _legacy_instr(loader, node):
+    name = loader.construct_scalar(node)
+    for i in core_instructions(PushTypeLibrary()):
+        if name == i.name:
+            return InstructionMeta(name=i.name, code_blocks=i.code_blocks)
+
+
+LegacyLoader.add_constructor(InstructionMeta.yaml_tag, _legacy_instr)
+LegacyLoader.add_constructor(Closer.yaml_tag, lambda loader, node: Closer())
+LegacyLoader.add_constructor(Input.yaml_tag, lambda loader, node: Input(input_index=int(loader.construct_scalar(node))))
+
+
+def _to_yaml(genome) -> str:
+    lines = []
+    for gene in genome:
+        if isinstance(gene, Closer):
+            lines.append("- !closer")
+        elif isinstance(gene, InstructionMeta):
+            lines.append("- !instr " + gene.name)
+        elif isinstance(gene, Input):
+            lines.append("- !input " + str(gene.input_index))
+        elif isinstance(gene, Literal) and isinstance(gene.value, (int, float)):
+            lines.append("- " + repr(gene.value))
+    return "\n".join(lines)
+
+
+def allocated(fn):
+    """Return the result of ``fn`` and the bytes it left allocated."""
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def compare_populations(spawner, n_genomes: int = 1000, size: int = 400):
+    np.random.seed(0)
+    genes = [spawner.spawn_genes(size) for _ in range(n_genomes)]
+    fresh, fresh_bytes = allocated(lambda: [Genome([_fresh(g) for g in gn]) for gn in genes])
+    interned, interned_bytes = allocated(lambda: [Genome(gn) for gn in genes])
+    assert fresh == interned
+    print("memory of {n} genomes of {sz} genes: fresh atoms {a:.1f} MB, interned atoms {b:.1f} MB".format(
+        n=n_genomes, sz=size, a=fresh_bytes / 1e6, b=interned_bytes / 1e6
+    ))
+    fresh_pickle = sum(len(pickle.dumps(gn)) for gn in fresh)
+    interned_pickle = sum(len(pickle.dumps(gn)) for gn in interned)
+    print("pickled size: fresh atoms {a:.1f} MB, interned atoms {b:.1f} MB".format(
+        a=fresh_pickle / 1e6, b=interned_pickle / 1e6
+    ))
+    # Unpickled genes are the interned instances of the receiving process.
+    restored = pickle.loads(pickle.dumps(fresh[0]))
+    assert restored == fresh[0]
+    assert all(a is b for a, b in zip(restored, interned[0]) if not isinstance(a, Literal))
+
+
+def compare_yaml(spawner, n_genomes: int = 20, size: int = 100):
+    np.random.seed(1)
+    document = "\n".join("- \n" + "\n".join("  " + line for line in _to_yaml(spawner.spawn_genome(size)).split("\n"))
+                         for _ in range(n_genomes))
+    start = time.perf_counter()
+    legacy = [from_yaml(gn) for gn in yaml.load(document, Loader=LegacyLoader)]
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    interned = [from_yaml(gn) for gn in yaml.unsafe_load(document)]
+    interned_time = time.perf_counter() - start
+    assert legacy == interned
+    print("{n} yaml genomes of {sz} genes: legacy {a:.3f}s, interned {b:.3f}s".format(
+        n=n_genomes, sz=size, a=legacy_time, b=interned_time
+    ))
+
+
+def main():
+    register_yaml_constructors()
+    _, _, spawner, _ = get_problem("number-io")
+    compare_populations(spawner)
+    compare_yaml(spawner)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 16:55:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 20:10:00
+'''
+
+
+import numpy as np
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.push.atoms import CodeBlock, Literal, InstructionMeta
+from pgsyn.push.interpreter import PushInterpreter, PushInterpreterStatus
+from pgsyn.push.program import Program, ProgramSignature
+from pgsyn.push.types import PushInt
+from pgsyn.tap import Tap, TapManager
+
+from utils import evolved_individuals, best_time
+
+
+class _AlwaysConvertInterpreter(PushInterpreter):
+    # Moves the untyped queue to the typed stacks after every atom, as the interpreter used to.
+
+    def evaluate_atom(self, atom, config):
+        super().evaluate_atom(atom, config)
+        self.untyped_to_typed()
+
+
+class _StepCounter(Tap):
+
+    def __init__(self):
+        self.steps = 0
+
+    def pre(self, id, args, kwargs, obj=None):
+        self.steps += 1
+
+
+class _SizeCheck(Tap):
+
+    def __init__(self):
+        self.checked = 0
+
+    def post(self, id, args, kwargs, returned):
+        state = args[0].state
+        assert state.size() == sum(len(s) for s in state.values()) + len(state.inputs)
+        self.checked += 1
+
+
+def check_size_tracking(programs, cases):
+    """Assert that the tracked PushState size matches a full recount after every step."""
+    check = _SizeCheck()
+    TapManager.register("pgsyn.push.interpreter.PushInterpreter.evaluate_atom", check)
+    interpreter = PushInterpreter()
+    for program in programs:
+        for inputs, _ in cases:
+            interpreter.run(program, inputs)
+    TapManager.unregister("pgsyn.push.interpreter.PushInterpreter.evaluate_atom")
+    print("PushState size matched a recount on {n} steps.".format(n=check.checked))
+
+
+def _with_limits(program: Program, growth_cap: int, step_limit: int = 500) -> Program:
+    push_config = program.signature.push_config.set(growth_cap=growth_cap, step_limit=step_limit)
+    return program.set(signature=program.signature.set(push_config=push_config))
+
+
+def _growth_cap_step(interpreter: PushInterpreter, program: Program, growth_cap: int, max_steps: int = 20) -> int:
+    # The step at which the growth cap stops the program is the smallest step limit that lets it run that far.
+    for step_limit in range(max_steps):
+        interpreter.run(_with_limits(program, growth_cap, step_limit), [])
+        if interpreter.status is PushInterpreterStatus.growth_cap_exceeded:
+            return step_limit
+        assert interpreter.status is PushInterpreterStatus.step_limit_exceeded, interpreter.status
+    raise AssertionError("The growth cap was not exceeded in {n} steps.".format(n=max_steps))
+
+
+def check_growth_cap(growth_cap: int = 10):
+    """Assert that the growth cap stops a program at the step where it is exceeded."""
+    # Pushes 7, duplicates it 3 times, then duplicates it 40 times, which exceeds the cap.
+    # Step 0 unpacks the code block, so the cap is exceeded at step 5.
+    code = CodeBlock([
+        Literal(value=7, push_type=PushInt),
+        Literal(value=3, push_type=PushInt),
+        InstructionMeta(name="int_dup_times", code_blocks=0),
+        Literal(value=40, push_type=PushInt),
+        InstructionMeta(name="int_dup_times", code_blocks=0),
+    ])
+    program = Program(code=code, signature=ProgramSignature(arity=0, output_stacks=["int"]))
+    step = _growth_cap_step(PushInterpreter(), program, growth_cap)
+    assert step == 5, step
+    print("Growth cap stopped the program at step {s}.".format(s=step))
+
+
+def count_steps(programs, cases) -> int:
+    """Count the atoms evaluated when running every program on every case."""
+    counter = _StepCounter()
+    TapManager.register("pgsyn.push.interpreter.PushInterpreter.evaluate_atom", counter)
+    interpreter = PushInterpreter()
+    for program in programs:
+        for inputs, _ in cases:
+            interpreter.run(program, inputs)
+    TapManager.unregister("pgsyn.push.interpreter.PushInterpreter.evaluate_atom")
+    return counter.steps
+
+
+def main():
+    for name in ["number-io", "replace-space-with-newline"]:
+        np.random.seed(0)
+        X, y, individuals = evolved_individuals(name)
+        cases = DatasetEvaluator(X, y).cases
+        programs = [i.program for i in individuals]
+        check_size_tracking(programs, cases)
+        steps = count_steps(programs, cases)
+        results = {}
+        for interpreter in [_AlwaysConvertInterpreter(), PushInterpreter()]:
+            outputs = []
+            duration = best_time(lambda: outputs.append(
+                [interpreter.run(p, inputs) for p in programs for inputs, _ in cases]
+            ))
+            results[type(interpreter)] = (steps / duration, outputs[0])
+        before, after = results[_AlwaysConvertInterpreter], results[PushInterpreter]
+        assert before[1] == after[1]
+        print("{nm}: {b:.0f} -> {a:.0f} steps/second ({s:.2f}x)".format(
+            nm=name,
+            b=before[0],
+            a=after[0],
+            s=after[0] / before[0]
+        ))
+    check_growth_cap()
+
+
+if __name__ == "__main__":
+    main()
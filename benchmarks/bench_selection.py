@@ -0,0 +1,119 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 16:40:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 16:40:00
+'''
+
+
+from collections import Counter
+
+import numpy as np
+from numpy.random import choice
+
+from pgsyn.gp.individual import Individual
+from pgsyn.gp.population import Population
+from pgsyn.gp.selection import Lexicase, DownsampledLexicase, CaseStream, one_individual_per_error_vector
+from pgsyn.push.program import ProgramSignature
+
+from utils import best_time
+
+
+def _legacy_select_one(population: Population, epsilon: bool) -> Individual:
+    # Lexicase selection prior to the batch engine: one full pass per parent.
+    candidates = one_individual_per_error_vector(population)
+    ep = 0.0
+    if epsilon:
+        ep = Lexicase._epsilon_from_mad(population.all_error_vectors())
+    for case in CaseStream(len(population[0].error_vector)):
+        if len(candidates) <= 1:
+            break
+        errors_this_case = [i.error_vector[case] for i in candidates]
+        max_error = min(errors_this_case)
+        if isinstance(ep, np.ndarray):
+            max_error += ep[case]
+        candidates = [i for i in candidates if i.error_vector[case] <= max_error]
+    return choice(candidates)
+
+
+def random_population(size: int, n_cases: int = 100) -> Population:
+    """Population with error vectors resembling a mid-run PSB1 population."""
+    signature = ProgramSignature(arity=1, output_stacks=["int"])
+    individuals = []
+    for _ in range(size):
+        individual = Individual(None, signature)
+        individual.error_vector = np.random.randint(0, 5, n_cases) * np.random.randint(0, 2, n_cases)
+        individuals.append(individual)
+    return Population(individuals)
+
+
+def check_equivalence(population: Population, n_parents: int = 200):
+    """Assert that per-child calls and one call to select_parents pick the same parents."""
+    for epsilon in [False, True]:
+        per_child = [Lexicase(epsilon, seed=1)]
+        per_child = [per_child[0].select(population, n=2) for _ in range(n_parents)]
+        batch = Lexicase(epsilon, seed=1).select_parents(population, n_parents, 2)
+        assert all(a is b for pc, bt in zip(per_child, batch) for a, b in zip(pc, bt))
+    print("Per-child selection and select_parents picked the same parents.")
+
+
+def check_legacy_distribution(population: Population, n_draws: int = 30000):
+    """Assert that the batch engine selects each error vector as often as the legacy implementation."""
+    for epsilon in [False, True]:
+        legacy = Counter(_legacy_select_one(population, epsilon).error_vector.tobytes() for _ in range(n_draws))
+        batch = Counter(i.error_vector.tobytes() for i in Lexicase(epsilon).select(population, n_draws))
+        keys = set(legacy) | set(batch)
+        worst = 0.0
+        for key in keys:
+            p = (legacy[key] + batch[key]) / (2.0 * n_draws)
+            std_err = np.sqrt(2.0 * p * (1 - p) / n_draws)
+            worst = max(worst, abs(legacy[key] - batch[key]) / n_draws / std_err)
+        distance = sum(abs(legacy[key] - batch[key]) for key in keys) / (2.0 * n_draws)
+        # About a hundred error vectors are compared, so allow for a few large deviations.
+        assert worst < 5.0, worst
+        print("epsilon={ep}: total variation distance to the legacy selection {d:.4f} over {n} draws "
+              "(largest deviation {z:.2f} standard errors).".format(ep=epsilon, d=distance, n=n_draws, z=worst))
+
+
+def check_downsampled_epsilon(n_cases: int = 100, n_outputs: int = 2, n_parents: int = 200):
+    """Assert that an epsilon array of the full training set is subset to the sampled cases."""
+    epsilon = np.random.randint(0, 3, n_cases * n_outputs)
+    selector = DownsampledLexicase(0.25, epsilon=epsilon)
+    case_indices = selector.sample_cases(n_cases)
+    population = random_population(500, len(case_indices) * n_outputs)
+    sampled_epsilon = epsilon.reshape(n_cases, n_outputs)[case_indices].ravel()
+    np.random.seed(1)
+    downsampled = selector.select(population, n_parents)
+    np.random.seed(1)
+    expected = Lexicase(sampled_epsilon).select(population, n_parents)
+    assert all(a is b for a, b in zip(downsampled, expected))
+    print("Down-sampled lexicase used the epsilons of the sampled cases.")
+
+
+def main(n_legacy: int = 50):
+    np.random.seed(0)
+    check_equivalence(random_population(500))
+    check_legacy_distribution(random_population(100, 20))
+    check_downsampled_epsilon()
+    for epsilon in [False, True]:
+        for size in [500, 1000, 2000, 5000]:
+            np.random.seed(0)
+            population = random_population(size)
+            legacy = best_time(lambda: [_legacy_select_one(population, epsilon) for _ in range(n_legacy)], 1)
+            # The pattern of an algorithm selecting the parents of one child at a time.
+            selector = Lexicase(epsilon)
+            per_child = best_time(lambda: [selector.select(population, n=1) for _ in range(size)], 1)
+            batch = best_time(lambda: Lexicase(epsilon).select_parents(population, size, 1), 1)
+            print("epsilon={ep}, size={sz}: {b:.1f} -> {c:.1f} (per child) / {a:.1f} (batch) selections/second "
+                  "({s:.1f}x)".format(
+                      ep=epsilon,
+                      sz=size,
+                      b=n_legacy / legacy,
+                      c=size / per_child,
+                      a=size / batch,
+                      s=(size / batch) / (n_legacy / legacy)
+                  ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 22:40:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 22:40:00
+'''
+
+
+import os
+import time
+
+import numpy as np
+
+from pgsyn.gp.algorithms.base import ParallelContext
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.gp.genome import GenomeSimplifier
+from pgsyn.gp.individual import Individual
+
+from utils import evolved_individuals, get_problem
+
+
+class CountingEvaluator(DatasetEvaluator):
+    """Counts the programs it evaluates."""
+
+    def __init__(self, X, y):
+        super().__init__(X, y)
+        self.n_evaluations = 0
+
+    def evaluate(self, program, error_budget=None, case_indices=None):
+        self.n_evaluations += 1
+        return super().evaluate(program, error_budget, case_indices)
+
+
+def compare_strategies(steps: int = 2000):
+    for name, genome_size in [("number-io", None), ("replace-space-with-newline", None),
+                              ("replace-space-with-newline", 800)]:
+        np.random.seed(0)
+        X, y, individuals = evolved_individuals(name)
+        _, _, spawner, signature = get_problem(name)
+        evaluator = CountingEvaluator(X, y)
+        if genome_size is not None:
+            individuals = [Individual(spawner.spawn_genome(genome_size), signature)]
+        for individual in individuals:
+            individual.error_vector = evaluator.evaluate(individual.program)
+        best = min(individuals, key=lambda i: (i.total_error, -len(i.genome)))
+        for strategy in ["random", "sweep"]:
+            np.random.seed(1)
+            evaluator.n_evaluations = 0
+            simplifier = GenomeSimplifier(evaluator, signature, strategy=strategy)
+            start = time.perf_counter()
+            genome, errors = simplifier.simplify(best.genome, best.error_vector, steps)
+            elapsed = time.perf_counter() - start
+            n_evaluations = evaluator.n_evaluations
+            assert np.sum(errors) <= best.total_error
+            assert np.array_equal(errors, evaluator.evaluate(Individual(genome, signature).program))
+            print("{nm}, {st}: length {b} -> {a}, total error {e0} -> {e1}, {n} evaluations in {t:.2f}s".format(
+                nm=name,
+                st=strategy,
+                b=len(best.genome),
+                a=len(genome),
+                e0=best.total_error,
+                e1=np.sum(errors),
+                n=n_evaluations,
+                t=elapsed
+            ))
+
+
+def main(steps: int = 1000):
+    n_proc = os.cpu_count()
+    for name in ["number-io", "replace-space-with-newline"]:
+        np.random.seed(0)
+        X, y, individuals = evolved_individuals(name)
+        _, _, spawner, signature = get_problem(name)
+        evaluator = DatasetEvaluator(X, y)
+        for individual in individuals:
+            individual.error_vector = evaluator.evaluate(individual.program)
+        best = min(individuals, key=lambda i: (i.total_error, -len(i.genome)))
+        context = ParallelContext(spawner, evaluator, n_proc)
+        for label, simplifier in [("serial", GenomeSimplifier(evaluator, signature)),
+                                  ("parallel", GenomeSimplifier(evaluator, signature, context.pool, n_proc))]:
+            np.random.seed(1)
+            start = time.perf_counter()
+            genome, errors = simplifier.simplify(best.genome, best.error_vector, steps)
+            print("{nm}, {lb}: length {b} -> {a}, total error {e0} -> {e1} in {t:.2f}s".format(
+                nm=name,
+                lb=label,
+                b=len(best.genome),
+                a=len(genome),
+                e0=best.total_error,
+                e1=np.sum(errors),
+                t=time.perf_counter() - start
+            ))
+        context.close()
+
+
+if __name__ == "__main__":
+    main()
+    compare_strategies()
@@ -0,0 +1,82 @@
+'''
+Author: He,Yifan
+Date: 2026-10-19 00:50:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-19 00:50:00
+'''
+
+
+from collections import Counter
+
+import numpy as np
+
+from pgsyn.gp.genome import Genome, GeneTypes, CompactGenome
+from pgsyn.push.atoms import Closer, Input, InstructionMeta
+
+from utils import get_problem, best_time
+
+
+def _legacy_random_gene(spawner):
+    # Gene spawning prior to spawn_genes: one distribution sample per gene.
+    atom_type = spawner.distribution.sample()
+    if atom_type is GeneTypes.INPUT:
+        return Input(input_index=np.random.randint(spawner.n_inputs))
+    elif atom_type is GeneTypes.INSTRUCTION:
+        i = np.random.choice(list(spawner.instruction_set.values()))
+        return InstructionMeta(name=i.name, code_blocks=i.code_blocks)
+    elif atom_type is GeneTypes.CLOSE:
+        return Closer()
+    elif atom_type is GeneTypes.LITERAL:
+        return spawner.random_literal()
+    return spawner.random_erc()
+
+
+def _legacy_spawn_genome(spawner, size: int) -> Genome:
+    return Genome([_legacy_random_gene(spawner) for _ in range(size)])
+
+
+def _gene_key(gene):
+    # ERC values are random, so only their kind is compared.
+    if isinstance(gene, (Input, InstructionMeta, Closer)):
+        return gene
+    return type(gene.value).__name__
+
+
+def check_equivalence(spawner, n_genes: int = 200000):
+    """Assert that spawn_genes and the legacy spawning draw genes with the same frequencies."""
+    legacy = Counter(_gene_key(_legacy_random_gene(spawner)) for _ in range(n_genes))
+    batch = Counter(_gene_key(gene) for gene in spawner.spawn_genes(n_genes))
+    worst = 0.0
+    for key in set(legacy) | set(batch):
+        p = (legacy[key] + batch[key]) / (2.0 * n_genes)
+        std_err = np.sqrt(2.0 * p * (1 - p) / n_genes)
+        z = abs(legacy[key] - batch[key]) / n_genes / std_err
+        worst = max(worst, z)
+    # Several hundred genes are compared, so allow for a few large deviations.
+    assert worst < 5.0, worst
+    np.random.seed(3)
+    genes = spawner.spawn_genes(500)
+    np.random.seed(3)
+    codes = spawner.spawn_gene_codes(500)
+    assert CompactGenome(codes, spawner.gene_table).to_genome() == Genome(genes)
+    print("{n} genes spawned with the same frequencies (largest deviation {z:.2f} standard errors).".format(
+        n=n_genes, z=worst
+    ))
+
+
+def main(n_genomes: int = 1000, size: int = 100):
+    for name in ["number-io", "replace-space-with-newline"]:
+        np.random.seed(0)
+        _, _, spawner, _ = get_problem(name)
+        check_equivalence(spawner)
+        for label, fn in [("legacy", lambda: _legacy_spawn_genome(spawner, size)),
+                          ("spawn_genome", lambda: spawner.spawn_genome(size)),
+                          ("spawn_genome compact", lambda: spawner.spawn_genome(size, compact=True))]:
+            t = best_time(lambda: [fn() for _ in range(n_genomes)])
+            print("{nm}, {lb}: {n} genomes of {sz} genes in {t:.3f}s".format(
+                nm=name, lb=label, n=n_genomes, sz=size, t=t
+            ))
+
+
+if __name__ == "__main__":
+    main()
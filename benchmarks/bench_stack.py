@@ -0,0 +1,77 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 19:50:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 19:50:00
+'''
+
+
+import numpy as np
+
+from pgsyn.push.atoms import Closer
+from pgsyn.push.config import PushConfig
+from pgsyn.push.stack import PushStack
+from pgsyn.push.type_library import PushTypeLibrary
+from pgsyn.push.types import Char, IntVector
+
+from utils import best_time
+
+
+VALUES = {
+    "int": [7, -3, np.int64(5), 10 ** 15, True, 2.5],
+    "float": [1.5, np.float64(-2.0), 1e20, 3],
+    "bool": [True, False, np.bool_(True), 0],
+    "char": [Char("a"), Char(" ")],
+    "str": ["hello", Char("b"), "x" * 2000],
+    "vector_int": [IntVector([1, 2, 3]), [4, 5], IntVector(range(2000))],
+    "exec": [Closer()],
+}
+
+
+def _legacy_push(stack: PushStack, value):
+    # Push prior to the specialized paths: every value is coerced and constrained.
+    stack.append(stack._coerce(value))
+
+
+def check_equivalence(library: PushTypeLibrary, config: PushConfig):
+    """Assert that both push paths store the same values with the same types."""
+    for name, values in VALUES.items():
+        fast = PushStack(library[name], config)
+        legacy = PushStack(library[name], config)
+        for value in values:
+            fast.push(value)
+            _legacy_push(legacy, value)
+        assert [(type(v), v) for v in fast] == [(type(v), v) for v in legacy], name
+    print("Pushed values are identical on {n} stack types.".format(n=len(VALUES)))
+
+
+def main(n_pushes: int = 100000):
+    library = PushTypeLibrary()
+    config = PushConfig()
+    check_equivalence(library, config)
+    for name, value in [("int", 7), ("float", 1.5), ("bool", True), ("char", Char("a")),
+                        ("str", "hello"), ("vector_int", IntVector([1, 2, 3])), ("exec", Closer())]:
+        stack = PushStack(library[name], config)
+
+        def run_legacy():
+            for _ in range(n_pushes):
+                _legacy_push(stack, value)
+            stack.flush()
+
+        def run_fast():
+            for _ in range(n_pushes):
+                stack.push(value)
+            stack.flush()
+
+        legacy = best_time(run_legacy)
+        fast = best_time(run_fast)
+        print("push {nm}: {b:.0f} -> {a:.0f} ns/push ({s:.1f}x)".format(
+            nm=name,
+            b=1e9 * legacy / n_pushes,
+            a=1e9 * fast / n_pushes,
+            s=legacy / fast
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 20:30:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 20:30:00
+'''
+
+
+import numpy as np
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.push.interpreter import PushInterpreter
+
+from utils import get_problem, random_individuals, best_time
+
+
+def main(n_programs: int = 200):
+    for name in ["number-io", "replace-space-with-newline"]:
+        for genome_size in [(1, 5), (5, 20), (20, 100)]:
+            np.random.seed(0)
+            X, y, spawner, signature = get_problem(name)
+            cases = DatasetEvaluator(X, y).cases
+            programs = [i.program for i in random_individuals(spawner, signature, n_programs, genome_size)]
+            n_cases = len(programs) * len(cases)
+            results = {}
+            for recycle_state in [False, True]:
+                interpreter = PushInterpreter(recycle_state=recycle_state)
+                outputs = []
+                duration = best_time(lambda: outputs.append(
+                    [interpreter.run(p, inputs) for p in programs for inputs, _ in cases]
+                ))
+                results[recycle_state] = (n_cases / duration, outputs[0])
+            assert results[False][1] == results[True][1]
+            print("{nm}, genome size {sz}: {b:.0f} -> {a:.0f} cases/second ({s:.2f}x)".format(
+                nm=name,
+                sz=genome_size,
+                b=results[False][0],
+                a=results[True][0],
+                s=results[True][0] / results[False][0]
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 22:00:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 22:00:00
+'''
+
+
+from collections import defaultdict
+
+import numpy as np
+
+from pgsyn.gp.evaluation import damerau_levenshtein_distance
+
+from utils import best_time
+
+
+def _legacy_distance(a, b) -> int:
+    # Distance prior to the fast kernel: full table of lists and a defaultdict.
+    len1 = len(a)
+    len2 = len(b)
+    infinite = len1 + len2
+    da = defaultdict(int)
+    score = [[0] * (len2 + 2) for x in range(len1 + 2)]
+    score[0][0] = infinite
+    for i in range(0, len1 + 1):
+        score[i + 1][0] = infinite
+        score[i + 1][1] = i
+    for i in range(0, len2 + 1):
+        score[0][i + 1] = infinite
+        score[1][i + 1] = i
+    for i in range(1, len1 + 1):
+        db = 0
+        for j in range(1, len2 + 1):
+            i1 = da[b[j - 1]]
+            j1 = db
+            cost = 1
+            if a[i - 1] == b[j - 1]:
+                cost = 0
+                db = j
+            score[i + 1][j + 1] = min(score[i][j] + cost,
+                                      score[i + 1][j] + 1,
+                                      score[i][j + 1] + 1,
+                                      score[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1))
+        da[a[i - 1]] = i
+    return score[len1 + 1][len2 + 1]
+
+
+def random_string(alphabet: str, max_len: int) -> str:
+    return "".join(np.random.choice(list(alphabet), np.random.randint(0, max_len + 1)))
+
+
+def mutate(s: str, alphabet: str, n_edits: int) -> str:
+    """Apply random insertions, deletions, substitutions and transpositions."""
+    s = list(s)
+    for _ in range(n_edits):
+        op = np.random.randint(4)
+        ndx = np.random.randint(len(s) + 1)
+        if op == 0 or len(s) == 0:
+            s.insert(ndx, np.random.choice(list(alphabet)))
+        elif op == 1:
+            del s[min(ndx, len(s) - 1)]
+        elif op == 2:
+            s[min(ndx, len(s) - 1)] = np.random.choice(list(alphabet))
+        elif len(s) > 1:
+            ndx = min(ndx, len(s) - 2)
+            s[ndx], s[ndx + 1] = s[ndx + 1], s[ndx]
+    return "".join(s)
+
+
+def check_properties(n_pairs: int = 20000):
+    """Assert the kernel matches the legacy function, with and without a cutoff."""
+    for alphabet, max_len in [("ab", 8), ("abc", 12), ("abcdefgh ", 30)]:
+        for _ in range(n_pairs):
+            a = random_string(alphabet, max_len)
+            b = mutate(a, alphabet, np.random.randint(0, 6)) if np.random.random() < 0.5 \
+                else random_string(alphabet, max_len)
+            expected = _legacy_distance(a, b)
+            assert damerau_levenshtein_distance(a, b) == expected, (a, b)
+            assert damerau_levenshtein_distance(list(a), list(b)) == expected, (a, b)
+            assert damerau_levenshtein_distance(b, a) == expected, (a, b)
+            max_distance = np.random.randint(0, 8)
+            bounded = damerau_levenshtein_distance(a, b, max_distance)
+            if expected <= max_distance:
+                assert bounded == expected, (a, b, max_distance)
+            else:
+                assert bounded == max_distance + 1, (a, b, max_distance)
+    print("Distances identical to the legacy function on {n} random pairs.".format(n=3 * n_pairs))
+
+
+def main(n_pairs: int = 200):
+    np.random.seed(0)
+    check_properties()
+    alphabet = "abcdefghijklmnopqrstuvwxyz \n"
+    for length in [10, 20, 50, 100]:
+        for n_edits in [2, length]:
+            expected = [random_string(alphabet, length) for _ in range(n_pairs)]
+            actual = [mutate(e, alphabet, n_edits) for e in expected]
+            pairs = list(zip(actual, expected))
+            legacy = best_time(lambda: [_legacy_distance(a, b) for a, b in pairs])
+            fast = best_time(lambda: [damerau_levenshtein_distance(a, b) for a, b in pairs])
+            cutoff = best_time(lambda: [damerau_levenshtein_distance(a, b, 5) for a, b in pairs])
+            print("length <= {ln}, {ed} edits: {b:.1f} -> {a:.1f} us/pair ({s:.1f}x), "
+                  "{c:.1f} us/pair with max_distance=5 ({cs:.1f}x)".format(
+                      ln=length,
+                      ed=n_edits,
+                      b=1e6 * legacy / n_pairs,
+                      a=1e6 * fast / n_pairs,
+                      s=legacy / fast,
+                      c=1e6 * cutoff / n_pairs,
+                      cs=legacy / cutoff
+                  ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 17:10:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 17:10:00
+'''
+
+
+from functools import wraps
+
+import numpy as np
+
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.push.interpreter import PushInterpreter
+from pgsyn.tap import Tap, TapManager, set_verbosity
+
+from bench_interpreter import count_steps
+from utils import evolved_individuals, best_time
+
+
+TAPPED_METHODS = ["evaluate_atom", "run"]
+
+
+def _legacy_wrap(fn, fn_id):
+    # The tap wrapper prior to binding taps at registration time.
+    @wraps(fn)
+    def tapped(*args, **kwargs):
+        tap = TapManager.get(fn_id)
+        if tap is not None:
+            tap.pre(fn_id, args, kwargs)
+        result = fn(*args, **kwargs)
+        if tap is not None:
+            tap.post(fn_id, args, kwargs, result)
+        return result
+    return tapped
+
+
+def _bind(wrapped: bool):
+    for name in TAPPED_METHODS:
+        fn_id = "pgsyn.push.interpreter.PushInterpreter." + name
+        fn = TapManager._tappable[fn_id]
+        setattr(PushInterpreter, name, _legacy_wrap(fn, fn_id) if wrapped else fn)
+
+
+def main():
+    set_verbosity(0)
+    np.random.seed(0)
+    X, y, individuals = evolved_individuals("number-io")
+    cases = DatasetEvaluator(X, y).cases
+    programs = [i.program for i in individuals]
+    steps = count_steps(programs, cases)
+    interpreter = PushInterpreter()
+
+    def run_all():
+        for p in programs:
+            for inputs, _ in cases:
+                interpreter.run(p, inputs)
+
+    _bind(wrapped=True)
+    legacy = best_time(run_all)
+    _bind(wrapped=False)
+    unwrapped = best_time(run_all)
+    # Let the TapManager rebind the methods as it does when a tap is removed.
+    for name in TAPPED_METHODS:
+        TapManager.register("pgsyn.push.interpreter.PushInterpreter." + name, Tap())
+        TapManager.unregister("pgsyn.push.interpreter.PushInterpreter." + name)
+    verbosity_0 = best_time(run_all)
+    print("always wrapped: {a:.0f} steps/second".format(a=steps / legacy))
+    print("verbosity 0:    {a:.0f} steps/second".format(a=steps / verbosity_0))
+    print("unwrapped:      {a:.0f} steps/second".format(a=steps / unwrapped))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 23:30:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 23:30:00
+'''
+
+
+import numpy as np
+
+from pgsyn.gp.genome import Genome
+from pgsyn.gp.variation import VariationPipeline, AdditionMutation, DeletionMutation, UMADMutation
+from pgsyn.push.atoms import Closer, Input, InstructionMeta, Literal
+
+from utils import get_problem, best_time
+
+
+def _copy(atom):
+    # The constructors make a new instance; copying or unpickling returns the interned one.
+    if isinstance(atom, Closer):
+        return Closer()
+    if isinstance(atom, InstructionMeta):
+        return InstructionMeta(name=atom.name, code_blocks=atom.code_blocks)
+    if isinstance(atom, Input):
+        return Input(input_index=atom.input_index)
+    return Literal(value=atom.value, push_type=atom.push_type)
+
+
+def child_stats(op, parent, spawner, n_children: int):
+    """Return the lengths, kept parent genes and new genes of many children."""
+    parent_ids = {id(gene) for gene in parent}
+    stats = []
+    for _ in range(n_children):
+        child = op.produce([parent], spawner)
+        kept = [gene for gene in child if id(gene) in parent_ids]
+        # Parent genes must keep their relative order.
+        remaining = iter(parent)
+        assert all(any(gene is other for other in remaining) for gene in kept)
+        stats.append((len(child), len(kept), len(child) - len(kept)))
+    return np.array(stats, dtype=float)
+
+
+def check_equivalence(parent, spawner, n_children: int = 2000):
+    """Assert that the pipeline and the fused operator agree in distribution."""
+    pipeline = VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.0826)])
+    fused = UMADMutation(0.09, 0.0826)
+    pipeline_stats = child_stats(pipeline, parent, spawner, n_children)
+    fused_stats = child_stats(fused, parent, spawner, n_children)
+    for col, label in enumerate(["length", "kept parent genes", "new genes"]):
+        a = pipeline_stats[:, col]
+        b = fused_stats[:, col]
+        std_err = np.sqrt(a.var() / len(a) + b.var() / len(b))
+        print("{lb}: pipeline {a:.2f} +- {sa:.2f}, fused {b:.2f} +- {sb:.2f}".format(
+            lb=label, a=a.mean(), sa=a.std(), b=b.mean(), sb=b.std()
+        ))
+        assert abs(a.mean() - b.mean()) < 5 * std_err
+        assert abs(a.std() - b.std()) < 0.1 * a.std()
+
+
+def main(genome_size: int = 400, n_children: int = 1000):
+    np.random.seed(0)
+    _, _, spawner, _ = get_problem("number-io")
+    # Spawned genes share instances, so the parent is made of copies to tell its genes apart.
+    parent = Genome([_copy(gene) for gene in spawner.spawn_genome(genome_size)])
+    check_equivalence(parent, spawner)
+
+    pipeline = VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.0826)])
+    fused = UMADMutation(0.09, 0.0826)
+    for label, op in [("pipeline", pipeline), ("fused", fused)]:
+        t = best_time(lambda: [op.produce([parent], spawner) for _ in range(n_children)], repeat=3)
+        print("{lb}: {n} children of {sz} genes in {t:.3f}s".format(lb=label, n=n_children, sz=genome_size, t=t))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+'''
+Author: He,Yifan
+Date: 2026-10-18 16:20:00
+LastEditors: He,Yifan
+LastEditTime: 2026-10-18 16:20:00
+'''
+
+
+import time
+from typing import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pgsyn.gp.algorithms.umad import UMAD
+from pgsyn.gp.evaluation import DatasetEvaluator
+from pgsyn.gp.genome import GeneSpawner
+from pgsyn.gp.individual import Individual
+from pgsyn.push.config import PushConfig
+from pgsyn.push.instruction_set import InstructionSet
+from pgsyn.push.program import ProgramSignature
+from pgsyn.push.types import Char
+
+
+VISIBLE = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'
+
+
+def number_io(n_cases: int = 25):
+    """Synthetic cases shaped like the PSB1 number-io problem."""
+    input1 = np.random.uniform(-100, 100, n_cases)
+    input2 = np.random.randint(-100, 101, n_cases)
+    X = pd.DataFrame({"input1": input1, "input2": input2})
+    y = pd.DataFrame({"output1": [str(a + b) for a, b in zip(input1, input2)]})
+    return X, y
+
+
+def _rswn_input():
+    s = ""
+    for _ in range(np.random.randint(1, 21)):
+        if np.random.random() < 0.2:
+            s += " "
+        else:
+            s += VISIBLE[np.random.randint(len(VISIBLE))]
+    return s
+
+
+def replace_space_with_newline(n_cases: int = 100):
+    """Synthetic cases shaped like the PSB1 replace-space-with-newline problem."""
+    inputs = [_rswn_input() for _ in range(n_cases)]
+    X = pd.DataFrame({"input1": inputs})
+    y = pd.DataFrame({
+        "output1": [s.replace(" ", "\n") for s in inputs],
+        "output2": [len(s.replace(" ", "")) for s in inputs],
+    })
+    return X, y
+
+
+def _randint():
+    return int(np.random.randint(-100, 101))
+
+
+def _randfloat():
+    return float(np.random.uniform(-100, 100))
+
+
+def _randchar():
+    return Char(VISIBLE[np.random.randint(len(VISIBLE))])
+
+
+PROBLEMS = {
+    "number-io": dict(
+        data=number_io,
+        n_inputs=2,
+        stacks={"int", "float", "exec", "stdout"},
+        literals=[],
+        erc_generators=[_randint, _randfloat],
+        output_stacks=["stdout"],
+        step_limit=200,
+    ),
+    "replace-space-with-newline": dict(
+        data=replace_space_with_newline,
+        n_inputs=1,
+        stacks={"exec", "int", "bool", "char", "str", "stdout"},
+        literals=[Char(" "), Char("\n")],
+        erc_generators=[_randchar, _rswn_input],
+        output_stacks=["stdout", "int"],
+        step_limit=1600,
+    ),
+}
+
+
+def get_problem(name: str):
+    """Return the dataset, spawner and program signature of a benchmark problem."""
+    problem = PROBLEMS[name]
+    X, y = problem["data"]()
+    spawner = GeneSpawner(
+        n_inputs=problem["n_inputs"],
+        instruction_set=InstructionSet().register_core_by_stack(problem["stacks"]),
+        literals=problem["literals"],
+        erc_generators=problem["erc_generators"],
+    )
+    signature = ProgramSignature(
+        arity=problem["n_inputs"],
+        output_stacks=problem["output_stacks"],
+        push_config=PushConfig(step_limit=problem["step_limit"]),
+    )
+    return X, y, spawner, signature
+
+
+def random_individuals(spawner: GeneSpawner, signature: ProgramSignature,
+                       n: int, genome_size: Sequence[int] = (20, 100)):
+    """Spawn ``n`` random individuals."""
+    return [Individual(spawner.spawn_genome(genome_size), signature) for _ in range(n)]
+
+
+def evolved_individuals(name: str, population_size: int = 200, generations: int = 5):
+    """Return the dataset and the last population of a short UMAD run on a benchmark problem."""
+    X, y, spawner, signature = get_problem(name)
+    search = UMAD(
+        signature=signature,
+        evaluator=DatasetEvaluator(X, y),
+        spawner=spawner,
+        population_size=population_size,
+        max_generations=generations,
+        simplification_steps=0,
+        parallelism=False,
+    )
+    search.run()
+    return X, y, list(search.population)
+
+
+def best_time(fn: Callable, repeat: int = 3) -> float:
+    """Return the best wall time (in seconds) of calling ``fn`` several times."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
@@ -93,6 +93,7 @@ def get_estimator(problem_filename, pushgp_filename):
     initial_genome_size = problem.get("initial_genome_size", [10, 50])
     max_genome_size = problem.get("max_genome_size")
     simplification_steps = problem.get("simplification_steps", 2000)
+    simplification_strategy = problem.get("simplification_strategy", "random")
     kwargs = pushgp.get(search)
     kwargs.update({"knowledge_archive": get_knowledge_archive(problem, ka, kwargs.get("ka"))})
     est = PushEstimator(
@@ -106,6 +107,7 @@ def get_estimator(problem_filename, pushgp_filename):
         initial_genome_size = initial_genome_size,
         max_genome_size = max_genome_size,
         simplification_steps = simplification_steps,
+        simplification_strategy = simplification_strategy,
         **kwargs
     )
     return est
@@ -7,13 +7,16 @@ LastEditTime: 2022-02-18 20:40:58
 
 
 from abc import ABC, abstractmethod
-from typing import Union, Tuple, Optional
+from typing import Union, Tuple, Optional, Sequence, List, FrozenSet
 
 from functools import partial
-from multiprocessing import Pool, Manager
+from multiprocessing import Pool
+import os
 
-from pgsyn.gp.evaluation import Evaluator
-from pgsyn.gp.genome import GeneSpawner, GenomeSimplifier
+import numpy as np
+
+from pgsyn.gp.evaluation import Evaluator, EvaluationCache, init_worker_evaluator, evaluate_in_worker
+from pgsyn.gp.genome import Genome, CompactGenome, GeneSpawner, GenomeSimplifier
 from pgsyn.gp.individual import Individual
 from pgsyn.gp.population import Population
 from pgsyn.gp.selection import Selector, get_selector
@@ -23,30 +26,77 @@ from pgsyn.utils import DiscreteProbDistrib
 from pgsyn.tap import tap
 
 
+# GeneSpawner and variation steps of a worker process. Set once per worker by the pool initializer.
+_worker_spawner: Optional[GeneSpawner] = None
+_worker_variation_steps: Optional[Sequence[Tuple[VariationOperator, dict]]] = None
+
+
+def _init_worker(spawner: GeneSpawner,
+                 evaluator: Evaluator,
+                 variation_steps: Optional[Sequence[Tuple[VariationOperator, dict]]] = None):
+    global _worker_spawner, _worker_variation_steps
+    _worker_spawner = spawner
+    _worker_variation_steps = variation_steps
+    init_worker_evaluator(evaluator)
+
+
 class ParallelContext:
-    """Holds the objects needed to coordinate parallelism."""
+    """Holds the objects needed to coordinate parallelism.
+
+    The spawner, the evaluator and the variation steps used to breed children
+    are handed to each worker process once, when the pool starts, so tasks
+    only need to carry genomes and programs.
+
+    """
 
     def __init__(self,
                  spawner: GeneSpawner,
                  evaluator: Evaluator,
-                 n_proc: Optional[int] = None):
-        self.manager = Manager()
-        self.ns = self.manager.Namespace()
-        self.ns.spawner = spawner
-        self.ns.evaluator = evaluator
-        self.pool = None
-        if n_proc is None:
-            self.pool = Pool()
-        else:
-            self.pool = Pool(n_proc)
+                 n_proc: Optional[int] = None,
+                 variation_steps: Optional[Sequence[Tuple[VariationOperator, dict]]] = None):
+        self.n_proc = n_proc or os.cpu_count()
+        self.pool = Pool(self.n_proc, initializer=_init_worker, initargs=(spawner, evaluator, variation_steps))
 
     def close(self):
         if self.pool is not None:
             self.pool.close()
 
 
-def _spawn_individual(spawner, genome_size, program_signature: ProgramSignature, *args):
-    return Individual(spawner.spawn_genome(genome_size), program_signature)
+def _spawn_individual(spawner, genome_size, program_signature: ProgramSignature, compact: bool = False, *args):
+    return Individual(spawner.spawn_genome(genome_size, compact=compact), program_signature)
+
+
+def _spawn_individual_in_worker(genome_size, program_signature: ProgramSignature, compact: bool, seed: int):
+    # Forked workers start from the same random state, so each task brings its own seed.
+    np.random.seed(seed)
+    _worker_spawner.gene_table.free_unused()
+    return _spawn_individual(_worker_spawner, genome_size, program_signature, compact)
+
+
+def _task_seeds(n: int) -> List[int]:
+    # Drawn from the random state of the main process, so seeded runs stay reproducible.
+    return np.random.randint(0, 2**31 - 1, size=n).tolist()
+
+
+def _breed_in_worker(program_signature: ProgramSignature,
+                     evaluate: bool,
+                     case_indices: Optional[np.ndarray],
+                     cached_keys: Optional[FrozenSet[bytes]],
+                     task: Tuple[List[Genome], int]):
+    parent_genomes, seed = task
+    np.random.seed(seed)
+    # The codes of genes only used by the genomes of earlier tasks are given to new genes.
+    _worker_spawner.gene_table.free_unused()
+    for op, kwargs in _worker_variation_steps:
+        parent_genomes = [op.produce(parent_genomes, _worker_spawner, **kwargs)]
+    child = Individual(parent_genomes[0], program_signature)
+    key = None
+    if cached_keys is not None:
+        key = EvaluationCache.key(child.program)
+    error_vector = None
+    if evaluate and (key is None or key not in cached_keys):
+        error_vector = evaluate_in_worker(child.program, case_indices=case_indices)
+    return child.genome, error_vector, key
 
 
 class SearchAlgorithm(ABC):
@@ -56,6 +106,36 @@ class SearchAlgorithm(ABC):
     ----------
     config : SearchConfiguration
         The configuration of the search algorithm.
+    evaluation_cache_size : int, optional
+        Maximum number of error vectors kept in the evaluation cache. Programs
+        found in the cache are not evaluated again. Default is 0, which disables
+        the cache.
+    simplification_strategy : str, optional
+        How the best genome is simplified at the end of the search. Either
+        ``"random"`` or ``"sweep"``. See ``GenomeSimplifier``. Default is
+        ``"random"``.
+    bounded_evaluation : bool, optional
+        If True, individuals that the selector can never pick are detected
+        during evaluation and the rest of their cases are skipped. Their error
+        vectors are then filled with the evaluator's penalty, and they are
+        left out of the median error and error diversity. Only selectors
+        with a ``selectable_count``, such as tournament and elite, benefit from
+        it. Default is False.
+    compact_genomes : bool, optional
+        If True, genomes are stored as ``CompactGenome`` arrays of gene codes
+        instead of sequences of Atoms. They take about half the memory and
+        their pickles, which is what is sent to worker processes, are several
+        times smaller. The codes of ERC values that no genome uses anymore are
+        reused by the spawner's ``GeneTable``. Default is False.
+    parallel_breeding : bool, optional
+        If True and the search is parallel, the main process only selects
+        parents. The parent genomes are sent to the workers, which produce
+        the children and evaluate them in the same task. With the evaluation
+        cache, the keys of the cached programs are sent along, and children
+        with a cached program are not evaluated again. With bounded
+        evaluation, the workers only produce the children, which are then
+        evaluated as usual, since the error budget depends on the children
+        evaluated before. Default is False.
 
     Attributes
     ----------
@@ -64,9 +144,13 @@ class SearchAlgorithm(ABC):
     generation : int
         The current generation, or iteration, of the search.
     best_seen : Individual
-        The best Individual, with respect to total error, seen so far.
+        The best Individual, with respect to total error, seen so far. Its
+        genome is a ``Genome`` even if the search uses compact genomes, so it
+        can be kept or saved after the run.
     population : Population
         The current Population of individuals.
+    evaluation_cache : Optional[EvaluationCache]
+        The cache of error vectors shared by all evaluations of the search.
 
     """
 
@@ -80,7 +164,12 @@ class SearchAlgorithm(ABC):
                  initial_genome_size: Tuple[int, int] = (10, 50),
                  max_genome_size: int = None,
                  simplification_steps: int = 2000,
+                 simplification_strategy: str = "random",
                  parallelism: Union[int, bool] = True,
+                 evaluation_cache_size: int = 0,
+                 bounded_evaluation: bool = False,
+                 compact_genomes: bool = False,
+                 parallel_breeding: bool = False,
                  **kwargs):
         self.signature = signature
         self.evaluator = evaluator
@@ -91,8 +180,17 @@ class SearchAlgorithm(ABC):
         self.initial_genome_size = initial_genome_size
         self.max_genome_size = max_genome_size
         self.simplification_steps = simplification_steps
+        self.simplification_strategy = simplification_strategy
+        self.bounded_evaluation = bounded_evaluation
+        self.compact_genomes = compact_genomes
+        self.parallel_breeding = parallel_breeding
         self.ext = kwargs
+        self.evaluation_cache = None
+        if evaluation_cache_size > 0:
+            self.evaluation_cache = EvaluationCache(evaluation_cache_size)
 
+        # Training cases sampled by a parallel breeding step for the next generation.
+        self._pending_case_indices = None
         self._p_context = self.get_parallel_context(parallelism, spawner, evaluator)
         self.generation = 0
         self.best_seen = None
@@ -101,11 +199,12 @@ class SearchAlgorithm(ABC):
 
     def get_parallel_context(self, parallelism, spawner, evaluator):
         self.parallel_context = None
+        variation_steps = self.variation_steps() if self.parallel_breeding else None
         if isinstance(parallelism, bool):
             if parallelism:
-                self.parallel_context = ParallelContext(spawner, evaluator)
+                self.parallel_context = ParallelContext(spawner, evaluator, variation_steps=variation_steps)
         elif parallelism > 1:
-            self.parallel_context = ParallelContext(spawner, evaluator, parallelism)
+            self.parallel_context = ParallelContext(spawner, evaluator, parallelism, variation_steps)
         return self.parallel_context
 
     def get_selector(self, selection, **kwargs):
@@ -134,12 +233,12 @@ class SearchAlgorithm(ABC):
         signature = self.signature
         self.population = Population()
         if self._p_context is not None:
-            gen_func = partial(_spawn_individual, self._p_context.ns.spawner, init_gn_size, signature)
-            for indiv in self._p_context.pool.imap_unordered(gen_func, range(pop_size)):
+            gen_func = partial(_spawn_individual_in_worker, init_gn_size, signature, self.compact_genomes)
+            for indiv in self._p_context.pool.imap(gen_func, _task_seeds(pop_size)):
                 self.population.add(indiv)
         else:
             for i in range(pop_size):
-                self.population.add(_spawn_individual(spawner, init_gn_size, signature))
+                self.population.add(_spawn_individual(spawner, init_gn_size, signature, self.compact_genomes))
 
     @tap
     @abstractmethod
@@ -154,20 +253,146 @@ class SearchAlgorithm(ABC):
         """
         pass
 
+    def variation_steps(self) -> Optional[Sequence[Tuple[VariationOperator, dict]]]:
+        """Return the variation operators applied in order to produce one child.
+
+        Each operator is given with the keyword arguments of its ``produce``
+        method. Parallel breeding hands them to the workers when the pool
+        starts, so they must be set before ``SearchAlgorithm.__init__`` is
+        called. Returns None if the algorithm cannot breed in parallel.
+
+        """
+        return None
+
+    def selectable_count(self) -> Optional[int]:
+        """Return how many of the best individuals can be selected as parents.
+
+        Returns None if any individual can be selected, which disables bounded
+        evaluation.
+
+        """
+        return None
+
+    def sample_cases(self) -> Optional[np.ndarray]:
+        """Return the indices of the training cases to evaluate this generation.
+
+        Returns None to evaluate the population on all training cases.
+
+        """
+        return None
+
+    def _breeds_in_parallel(self) -> bool:
+        return self.parallel_breeding and self._p_context is not None
+
+    def _p_breed(self, selector: Selector) -> Population:
+        """Produce the next population in the worker processes.
+
+        The parents of all children are selected in the main process with one
+        call to ``select``. Each worker task applies the ``variation_steps``
+        the worker received when the pool started, each operator to the child
+        of the previous one. It also evaluates the child, unless the search
+        has bounded evaluation. With an evaluation cache, the task carries the
+        keys of the cached programs, and the error vectors of children with a
+        cached program are taken from the cache instead.
+
+        Parameters
+        ----------
+        selector : Selector
+            The selector used to pick the parents of each child.
+
+        Returns
+        -------
+        Population
+            The children. They are evaluated unless the search has bounded
+            evaluation.
+
+        """
+        num_parents = self.variation_steps()[0][0].num_parents
+        parent_genomes = [
+            [p.genome for p in parents]
+            for parents in selector.select_parents(self.population, self.population_size, num_parents)
+        ]
+        # The error budget of bounded evaluation depends on the children evaluated before.
+        evaluate = not self.bounded_evaluation
+        case_indices = None
+        if evaluate:
+            # The children are evaluated on the cases of the generation they belong to.
+            case_indices = self._sample_generation_cases()
+            self._pending_case_indices = (case_indices,)
+        cache = self.evaluation_cache if evaluate else None
+        cached_keys = None if cache is None else frozenset(cache.keys())
+        breed = partial(_breed_in_worker, self.signature, evaluate, case_indices, cached_keys)
+        tasks = list(zip(parent_genomes, _task_seeds(self.population_size)))
+        chunksize = max(1, len(tasks) // (4 * self._p_context.n_proc))
+        children = Population()
+        for genome, error_vector, key in self._p_context.pool.imap(breed, tasks, chunksize=chunksize):
+            child = Individual(genome, self.signature)
+            if cache is not None:
+                if error_vector is None:
+                    # None if the entry was evicted since, then the child is evaluated with the population.
+                    error_vector = cache.get(None, key)
+                else:
+                    cache.misses += 1
+                    cache.put(None, error_vector, key)
+            if error_vector is not None:
+                child.error_vector = error_vector
+            children.add(child)
+        return children
+
+    def _detached(self, individual: Individual) -> Individual:
+        # CompactGenomes only mean something with the GeneTable of this run.
+        if not isinstance(individual.genome, CompactGenome):
+            return individual
+        detached = Individual(individual.genome.to_genome(), self.signature)
+        detached.error_vector = individual.error_vector
+        return detached
+
+    def _evaluate_on_all_cases(self, individual: Individual) -> Individual:
+        verified = Individual(individual.genome, self.signature)
+        verified.error_vector = self.evaluator.evaluate(verified.program)
+        return verified
+
+    def _sample_generation_cases(self) -> Optional[np.ndarray]:
+        case_indices = self.sample_cases()
+        if case_indices is not None and self.evaluation_cache is not None:
+            # Cached error vectors were computed on the cases of earlier generations.
+            self.evaluation_cache.clear()
+        return case_indices
+
     def _full_step(self) -> bool:
         self.generation += 1
+        selectable = self.selectable_count() if self.bounded_evaluation else None
+        if self._pending_case_indices is not None:
+            case_indices, = self._pending_case_indices
+            self._pending_case_indices = None
+        else:
+            case_indices = self._sample_generation_cases()
         if self._p_context is not None:
-            self.population.p_evaluate(self._p_context.ns.evaluator, self._p_context.pool)
+            self.population.p_evaluate(self._p_context.pool,
+                                       cache=self.evaluation_cache,
+                                       selectable=selectable,
+                                       wave_size=4 * self._p_context.n_proc,
+                                       case_indices=case_indices)
         else:
-            self.population.evaluate(self.evaluator)
+            self.population.evaluate(self.evaluator,
+                                     cache=self.evaluation_cache,
+                                     selectable=selectable,
+                                     case_indices=case_indices)
 
         best_this_gen = self.population.best()
+        if case_indices is not None:
+            # Errors on a subset of the cases are not comparable across generations,
+            # and a program can solve the subset without solving the problem.
+            best_this_gen = self._evaluate_on_all_cases(best_this_gen)
         if self.best_seen is None or best_this_gen.total_error < self.best_seen.total_error:
-            self.best_seen = best_this_gen
+            self.best_seen = self._detached(best_this_gen)
             if self.best_seen.total_error <= self.error_threshold:
                 return False
 
         self.step()
+        if self.compact_genomes:
+            # Free the codes of the ERCs that left the population with the previous generation.
+            self.spawner.gene_table.free_unused()
         return True
 
     def is_solved(self) -> bool:
@@ -182,9 +407,16 @@ class SearchAlgorithm(ABC):
                 break
 
         # Simplify the best individual for a better generalization and interpretation.
+        # Candidates are only evaluated concurrently if there is more than one worker.
+        p_context = self._p_context
+        if p_context is not None and p_context.n_proc < 2:
+            p_context = None
         simplifier = GenomeSimplifier(
             self.evaluator,
-            self.signature
+            self.signature,
+            pool=None if p_context is None else p_context.pool,
+            n_candidates=None if p_context is None else p_context.n_proc,
+            strategy=self.simplification_strategy
         )
         simp_genome, simp_error_vector = simplifier.simplify(
             self.best_seen.genome,
@@ -6,7 +6,9 @@ LastEditTime: 2022-02-18 20:55:30
 '''
 
 
-from typing import Optional, Tuple, Union
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from pgsyn.gp.algorithms.base import SearchAlgorithm
 from pgsyn.gp.evaluation import Evaluator
@@ -14,7 +16,8 @@ from pgsyn.gp.genome import GeneSpawner
 from pgsyn.gp.individual import Individual
 from pgsyn.gp.population import Population
 from pgsyn.gp.selection import Selector
-from pgsyn.gp.variation import VariationPipeline, AdditionMutation, DeletionMutation, ReplacementMutation
+from pgsyn.gp.variation import VariationOperator, VariationPipeline, AdditionMutation, DeletionMutation, UMADMutation
+from pgsyn.gp.variation import ReplacementMutation
 from pgsyn.knowledge.base import KnowledgeArchive
 from pgsyn.push.program import ProgramSignature
 from pgsyn.utils import DiscreteProbDistrib
@@ -36,6 +39,10 @@ class UMADR(SearchAlgorithm):
             o_i = replacement_mutation(o_i, k_i, replacement_rate)
             X_t+1 = X_t+1 U {o_i}
 
+    If ``fused_variation`` is True, the addition and deletion mutations are
+    applied in a single pass by ``UMADMutation``, which produces children with
+    the same distribution from fewer random draws.
+
     """
 
     def __init__(self,
@@ -53,9 +60,35 @@ class UMADR(SearchAlgorithm):
                  initial_genome_size: Tuple[int, int] = (10, 50),
                  max_genome_size: Optional[int] = None,
                  simplification_steps: int = 2000,
+                 simplification_strategy: str = "random",
                  parallelism: Union[int, bool] = True,
+                 evaluation_cache_size: int = 0,
+                 bounded_evaluation: bool = False,
+                 fused_variation: bool = False,
+                 compact_genomes: bool = False,
+                 parallel_breeding: bool = False,
                  **kwargs):
 
+        # The operators are set before the worker pool is started, which receives them once.
+        self.knowledge_archive = knowledge_archive
+        self.selection = selection
+        self.variation = "umadr"
+        self.selector = self.get_selector(selection)
+        self.addition_rate = addition_rate
+        self.deletion_rate = deletion_rate
+        self.replacement_rate = replacement_rate
+        self.fused_variation = fused_variation
+        if fused_variation:
+            self.op_umad = self.get_variation_op(UMADMutation(addition_rate, deletion_rate))
+        else:
+            self.op_umad = self.get_variation_op(VariationPipeline([
+                AdditionMutation(addition_rate),
+                DeletionMutation(deletion_rate)
+            ]))
+        self.op_r = self.get_variation_op(
+            ReplacementMutation(replacement_rate)
+        )
+
         super().__init__(
             signature=signature,
             evaluator=evaluator,
@@ -66,35 +99,44 @@ class UMADR(SearchAlgorithm):
             initial_genome_size=initial_genome_size,
             max_genome_size=max_genome_size,
             simplification_steps=simplification_steps,
+            simplification_strategy=simplification_strategy,
             parallelism=parallelism,
+            evaluation_cache_size=evaluation_cache_size,
+            bounded_evaluation=bounded_evaluation,
+            compact_genomes=compact_genomes,
+            parallel_breeding=parallel_breeding,
             **kwargs
         )
 
-        self.knowledge_archive = knowledge_archive
-        self.selection = selection
-        self.variation = "umadr"
-        self.selector = self.get_selector(selection)
-        self.addition_rate = addition_rate
-        self.deletion_rate = deletion_rate
-        self.replacement_rate = replacement_rate
-        self.op_umad = self.get_variation_op(VariationPipeline([
-            AdditionMutation(addition_rate),
-            DeletionMutation(deletion_rate)
-        ]))
-        self.op_r = self.get_variation_op(
-            ReplacementMutation(replacement_rate)
-        )
+    def variation_steps(self) -> Optional[Sequence[Tuple[VariationOperator, dict]]]:
+        """Return the UMAD and replacement operators with their keyword arguments."""
+        return [
+            (self.op_umad, {"max_genome_size": self.max_genome_size, "compact": self.compact_genomes}),
+            (self.op_r, {"knowledge_archive": self.knowledge_archive,
+                         "max_genome_size": self.max_genome_size,
+                         "compact": self.compact_genomes})
+        ]
+
+    def selectable_count(self) -> Optional[int]:
+        """Return how many of the best individuals can be selected as parents."""
+        return self.selector.selectable_count(self.population_size, self.op_umad.num_parents)
+
+    def sample_cases(self) -> Optional[np.ndarray]:
+        """Return the indices of the training cases the selector asks for this generation."""
+        return self.selector.sample_cases(self.evaluator.n_cases)
 
-    def _make_child(self) -> Individual:
-        parent_genomes = [p.genome for p in self.selector.select(self.population, n=self.op_umad.num_parents)]
+    def _make_child(self, parents: Sequence[Individual]) -> Individual:
+        parent_genomes = [p.genome for p in parents]
         child_genome = self.op_umad.produce(parent_genomes,
                                             self.spawner,
-                                            max_genome_size=self.max_genome_size)
+                                            max_genome_size=self.max_genome_size,
+                                            compact=self.compact_genomes)
         parent_genomes = [child_genome]
         child_genome = self.op_r.produce(parent_genomes,
                                          self.spawner,
                                          knowledge_archive=self.knowledge_archive,
-                                         max_genome_size=self.max_genome_size)
+                                         max_genome_size=self.max_genome_size,
+                                         compact=self.compact_genomes)
         return Individual(child_genome, self.signature)
 
     @tap
@@ -106,6 +148,10 @@ class UMADR(SearchAlgorithm):
 
         """
         super().step()
+        if self._breeds_in_parallel():
+            self.population = self._p_breed(self.selector)
+            return
+        parents = self.selector.select_parents(self.population, self.population_size, self.op_umad.num_parents)
         self.population = Population(
-            [self._make_child() for _ in range(self.population_size)]
+            [self._make_child(p) for p in parents]
         )
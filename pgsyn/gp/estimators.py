@@ -48,6 +48,10 @@ class PushEstimator:
     simplification_steps : int
         The number of simplification iterations to apply to the best Push program
         produced by the search algorithm. Default 2000.
+    simplification_strategy : str
+        Either "random", which removes random genes each simplification step,
+        or "sweep", which tries deleting every code block and gene once. Default
+        is "random".
     interpreter : PushInterpreter, optional
         The PushInterpreter to use when making predictions. Also holds the instruction
         set to use
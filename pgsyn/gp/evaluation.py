@@ -7,22 +7,31 @@ LastEditTime: 2022-02-20 20:10:18
 
 
 from abc import ABC, abstractmethod
-from typing import Sequence, Union, Callable
-from collections import defaultdict
+from typing import Sequence, Union, Callable, Optional, Tuple, List
+from collections import OrderedDict
+import hashlib
 import numpy as np
 import pandas as pd
 
+from pgsyn.push.atoms import Atom, CodeBlock, Literal, InstructionMeta, Input
 from pgsyn.push.interpreter import PushInterpreter, Program
 from pgsyn.tap import tap
 from pgsyn.utils import Token
 
 
-def damerau_levenshtein_distance(a: Union[str, Sequence], b: Union[str, Sequence]) -> int:
+def damerau_levenshtein_distance(a: Union[str, Sequence],
+                                 b: Union[str, Sequence],
+                                 max_distance: Optional[int] = None) -> int:
     """Damerau-Levenshtein Distance that works for both strings and lists.
 
     https://en.wikipedia.org/wiki/Damerau%E2%80%93Levenshtein_distance.
     This implementation is heavily inspired by the implementation in the
     jellyfish package. https://github.com/jamesturk/jellyfish
+
+    The common prefix and suffix of the sequences are skipped before filling
+    the score table. If ``max_distance`` is given, the computation stops as
+    soon as the distance is known to be greater than it, and
+    ``max_distance + 1`` is returned instead.
     """
     a_is_str = isinstance(a, str)
     b_is_str = isinstance(b, str)
@@ -31,34 +40,113 @@ def damerau_levenshtein_distance(a: Union[str, Sequence], b: Union[str, Sequence
 
     len1 = len(a)
     len2 = len(b)
-    infinite = len1 + len2
-
-    da = defaultdict(int)
-    score = [[0] * (len2 + 2) for x in range(len1 + 2)]
-    score[0][0] = infinite
-    for i in range(0, len1 + 1):
-        score[i + 1][0] = infinite
-        score[i + 1][1] = i
-    for i in range(0, len2 + 1):
-        score[0][i + 1] = infinite
-        score[1][i + 1] = i
+    start = 0
+    while start < len1 and start < len2 and a[start] == b[start]:
+        start += 1
+    while len1 > start and len2 > start and a[len1 - 1] == b[len2 - 1]:
+        len1 -= 1
+        len2 -= 1
+    a = a[start:len1]
+    b = b[start:len2]
+    len1 -= start
+    len2 -= start
+    if max_distance is not None and abs(len1 - len2) > max_distance:
+        return max_distance + 1
+    if len1 == 0 or len2 == 0:
+        return len1 + len2
 
+    infinite = len1 + len2
+    da = {}
+    # score[i + 1][j + 1] is the distance between a[:i] and b[:j].
+    score = [[infinite] * (len2 + 2), [infinite] + list(range(len2 + 1))]
     for i in range(1, len1 + 1):
+        a_i = a[i - 1]
+        prev = score[i]
+        row = [infinite, i] + [0] * len2
         db = 0
         for j in range(1, len2 + 1):
-            i1 = da[b[j - 1]]
+            b_j = b[j - 1]
+            i1 = da.get(b_j, 0)
             j1 = db
-            cost = 1
-            if a[i - 1] == b[j - 1]:
-                cost = 0
+            if a_i == b_j:
+                dist = prev[j]
                 db = j
+            else:
+                dist = prev[j] + 1
+            if row[j] + 1 < dist:
+                dist = row[j] + 1
+            if prev[j + 1] + 1 < dist:
+                dist = prev[j + 1] + 1
+            transposition = score[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1)
+            if transposition < dist:
+                dist = transposition
+            row[j + 1] = dist
+        score.append(row)
+        da[a_i] = i
+        # Row minimums never decrease, so the distance is at least this one.
+        if max_distance is not None and min(row[1:]) > max_distance:
+            return max_distance + 1
+    distance = score[len1 + 1][len2 + 1]
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
+    return distance
+
+
+class StringDistanceMemo:
+    """A bounded LRU memo of Damerau-Levenshtein distances.
+
+    Programs of a population often produce the same output on a case (the
+    empty string, or the input unchanged), so the distance between a program
+    output and an expected value is computed once per distinct pair. Pairs
+    are keyed by their plain strings, since Chars are not hashable.
 
-            score[i + 1][j + 1] = min(score[i][j] + cost,
-                                      score[i + 1][j] + 1,
-                                      score[i][j + 1] + 1,
-                                      score[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1))
-        da[a[i - 1]] = i
-    return score[len1 + 1][len2 + 1]
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximum number of distances to keep. The least recently used entry
+        is evicted first. Default is 10000.
+
+    Attributes
+    ----------
+    hits : int
+        Number of distances found in the memo.
+    misses : int
+        Number of distances that had to be computed.
+
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._distances = OrderedDict()
+
+    def __len__(self):
+        return len(self._distances)
+
+    def distance(self, actual: str, expected: str) -> int:
+        """Return the Damerau-Levenshtein distance between the two strings."""
+        key = (str(actual), str(expected))
+        distance = self._distances.get(key)
+        if distance is not None:
+            self.hits += 1
+            self._distances.move_to_end(key)
+            return distance
+        self.misses += 1
+        distance = damerau_levenshtein_distance(*key)
+        self._distances[key] = distance
+        if len(self._distances) > self.max_size:
+            self._distances.popitem(last=False)
+        return distance
+
+    def clear(self):
+        """Remove all memoized distances. Does not reset the counters."""
+        self._distances.clear()
+
+    def hit_rate(self) -> float:
+        """Proportion of distances answered by the memo."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
 
 
 class Evaluator(ABC):
@@ -73,20 +161,41 @@ class Evaluator(ABC):
     penalty : float, optional
         When a program's output cannot be evaluated on a particular case, the
         penalty error is assigned. Default is 5e5.
+    distance_memo_size : int, optional
+        Maximum number of string distances kept by the evaluator's
+        ``StringDistanceMemo``. Default is 10000. Zero disables the memo.
     verbosity_config : Optional[VerbosityConfig] (default = None)
         A VerbosityConfig controlling what is logged during evaluation.
         Default is no verbosity.
 
+    Attributes
+    ----------
+    stopped_early : bool
+        True if the most recent call to ``evaluate`` skipped some cases because
+        the error budget was exceeded, so the error vector it returned is not
+        the program's true error vector.
+
     """
 
     def __init__(self,
                  interpreter: PushInterpreter = "default",
-                 penalty: float = 1e6):
+                 penalty: float = 1e6,
+                 distance_memo_size: int = 10000):
         self.penalty = penalty
         if interpreter == "default":
             self.interpreter = PushInterpreter()
         else:
             self.interpreter = interpreter
+        self.distance_memo = None
+        if distance_memo_size > 0:
+            self.distance_memo = StringDistanceMemo(distance_memo_size)
+        self.stopped_early = False
+
+    def string_distance(self, actual: str, expected: str) -> int:
+        """Return the Damerau-Levenshtein distance, memoized if the evaluator has a memo."""
+        if self.distance_memo is None:
+            return damerau_levenshtein_distance(actual, expected)
+        return self.distance_memo.distance(actual, expected)
 
     def default_error_function(self, actuals, expecteds) -> np.array:
         """Produce errors of actual program output given expected program output.
@@ -121,22 +230,37 @@ class Evaluator(ABC):
                 except OverflowError:
                     errors.append(self.penalty)
             elif isinstance(expected, str):
-                errors.append(damerau_levenshtein_distance(str(actual), expected))
+                errors.append(self.string_distance(str(actual), expected))
             elif isinstance(expected, list):
                 errors += list(self.default_error_function(list(actual), expected))
             else:
                 raise ValueError("Unknown expected type for {e}".format(e=expected))
         return np.array(errors)
 
+    @property
+    def n_cases(self) -> Optional[int]:
+        """Number of training cases, or None if the evaluator has no fixed cases."""
+        return None
+
     @tap
     @abstractmethod
-    def evaluate(self, program: Program) -> np.ndarray:
+    def evaluate(self,
+                 program: Program,
+                 error_budget: Optional[float] = None,
+                 case_indices: Optional[Sequence[int]] = None) -> np.ndarray:
         """Evaluate the program and return the error vector.
 
         Parameters
         ----------
         program
             Program (CodeBlock of Push code) to evaluate.
+        error_budget
+            If given, evaluators may stop as soon as the program's total error
+            exceeds this value, and fill the rest of the error vector with the
+            penalty. Default is None, which always evaluates every case.
+        case_indices
+            If given, only the training cases at these indices are evaluated,
+            in this order. Default is None, which evaluates all cases.
 
         Returns
         -------
@@ -144,7 +268,18 @@ class Evaluator(ABC):
             The error vector of the program.
 
         """
-        pass
+        self.stopped_early = False
+
+
+def _column_kind(column: pd.Series) -> str:
+    # The kind of error computed for an output column, from its expected values.
+    if column.dtype.kind == "b":
+        return "bool"
+    if column.dtype.kind in "iuf":
+        return "number"
+    if all(isinstance(value, str) for value in column):
+        return "str"
+    return "other"
 
 
 class DatasetEvaluator(Evaluator):
@@ -153,7 +288,9 @@ class DatasetEvaluator(Evaluator):
     def __init__(self,
                  X, y,
                  interpreter: PushInterpreter = "default",
-                 penalty: float = 1e6):
+                 penalty: float = 1e6,
+                 batch_cases: bool = False,
+                 distance_memo_size: int = 10000):
         """Create Evaluator based on a labeled dataset. Inspired by sklearn.
 
         Parameters
@@ -171,19 +308,58 @@ class DatasetEvaluator(Evaluator):
             If no response is given by the program on a given input, assign this
             error as the error.
 
+        batch_cases : bool
+            If True, programs evaluated without an error budget are run on all
+            cases at once with ``PushInterpreter.run_batch``. The runtime limit
+            is then shared by the cases instead of applying to each case, and
+            taps on ``PushInterpreter.run`` are not called. Default is False,
+            which runs the cases one by one.
+
+        distance_memo_size : int
+            Maximum number of string distances to memoize. Zero disables the
+            memo. Default is 10000.
+
         """
-        super().__init__(interpreter, penalty)
+        super().__init__(interpreter, penalty, distance_memo_size)
+        self.batch_cases = batch_cases
         self.X = pd.DataFrame(X)
         self.y = pd.DataFrame(y)
+        # Rows are materialized once so that evaluation never touches pandas.
+        self.cases = tuple(zip(
+            self.X.itertuples(index=False, name=None),
+            self.y.itertuples(index=False, name=None)
+        ))
+        # Output columns are typed once so that batched errors are computed per column.
+        self.output_kinds = [_column_kind(self.y[col]) for col in self.y.columns]
+        self._expected_columns = [
+            self.y[col].to_numpy(dtype=(bool if kind == "bool" else float)) if kind in ("bool", "number")
+            else self.y[col].to_list()
+            for col, kind in zip(self.y.columns, self.output_kinds)
+        ]
+
+    @property
+    def n_cases(self) -> Optional[int]:
+        """Number of training cases."""
+        return len(self.cases)
 
     @tap
-    def evaluate(self, program: Program) -> np.array:
+    def evaluate(self,
+                 program: Program,
+                 error_budget: Optional[float] = None,
+                 case_indices: Optional[Sequence[int]] = None) -> np.array:
         """Evaluate the program and return the error vector.
 
         Parameters
         ----------
         program
             Program (CodeBlock of Push code) to evaluate.
+        error_budget
+            If given, the remaining cases are skipped as soon as the total
+            error exceeds this value and their errors are set to the penalty.
+            Default is None, which always evaluates every case.
+        case_indices
+            If given, only the training cases at these indices are evaluated,
+            in this order. Default is None, which evaluates all cases.
 
         Returns
         -------
@@ -191,15 +367,92 @@ class DatasetEvaluator(Evaluator):
             The error vector of the program.
 
         """
-        super().evaluate(program)
+        super().evaluate(program, error_budget, case_indices)
+        cases = self.cases
+        if case_indices is not None:
+            cases = [cases[ndx] for ndx in case_indices]
+        if error_budget is None:
+            if self.batch_cases:
+                outputs = self.interpreter.run_batch(program, [inputs for inputs, _ in cases])
+            else:
+                outputs = [self.interpreter.run(program, inputs) for inputs, _ in cases]
+            return self.batch_errors(outputs, case_indices)
         errors = []
-        for ndx in range(self.X.shape[0]):
-            inputs = self.X.iloc[ndx].to_list()
-            expected = self.y.iloc[ndx].to_list()
+        total_error = 0.0
+        for ndx, (inputs, expected) in enumerate(cases):
             actual = self.interpreter.run(program, inputs)
             errors.append(self.default_error_function(actual, expected))
+            if error_budget is not None:
+                total_error += np.sum(errors[-1])
+                if total_error > error_budget and ndx + 1 < len(cases):
+                    errors += [np.full(len(e), self.penalty) for _, e in cases[ndx + 1:]]
+                    self.stopped_early = True
+                    break
         return np.array(errors).flatten()
 
+    def batch_errors(self, outputs: Sequence[list], case_indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Produce the error vector of the outputs of a program on many cases.
+
+        Errors are computed one output column at a time. Bool and numeric
+        columns are compared to the expected values with NumPy, string columns
+        use the Damerau-Levenshtein distance, and any other column falls back
+        to ``default_error_function`` case by case. The result is identical
+        to concatenating ``default_error_function`` over the cases.
+
+        Parameters
+        ----------
+        outputs : Sequence[list]
+            The outputs of the program on each case, as returned by
+            ``PushInterpreter.run_batch``.
+        case_indices : Sequence[int], optional
+            The indices of the cases the outputs belong to. Default is None,
+            which means all cases, in order.
+
+        Returns
+        -------
+        np.ndarray
+            The error vector of the program.
+
+        """
+        if "other" in self.output_kinds:
+            cases = self.cases if case_indices is None else [self.cases[ndx] for ndx in case_indices]
+            errors = [self.default_error_function(actual, expected)
+                      for actual, (_, expected) in zip(outputs, cases)]
+            return np.array(errors).flatten()
+        columns = []
+        for col, kind in enumerate(self.output_kinds):
+            expected = self._expected_columns[col]
+            if case_indices is not None:
+                expected = expected[case_indices] if kind != "str" else [expected[ndx] for ndx in case_indices]
+            actuals = [output[col] for output in outputs]
+            columns.append(self._column_errors(kind, actuals, expected))
+        if len(columns) == 0:
+            return np.array([])
+        return np.column_stack(columns).flatten()
+
+    def _column_errors(self, kind: str, actuals: list, expected) -> np.ndarray:
+        missing = np.array([actual is Token.no_stack_item for actual in actuals], dtype=bool)
+        if kind == "str":
+            return np.array([
+                self.penalty if m else self.string_distance(str(actual), exp)
+                for actual, exp, m in zip(actuals, expected, missing)
+            ])
+        if kind == "bool":
+            values = np.array([False if m else bool(actual) for actual, m in zip(actuals, missing)], dtype=bool)
+            errors = (values != expected).astype(np.int64)
+        else:
+            try:
+                values = np.array([np.nan if m else float(actual) for actual, m in zip(actuals, missing)],
+                                  dtype=float)
+            except (OverflowError, TypeError, ValueError):
+                # Leave unusual outputs to the error function of single values.
+                return np.array([self.default_error_function([actual], [exp])[0]
+                                 for actual, exp in zip(actuals, expected)])
+            errors = np.abs(values - expected)
+        if missing.any():
+            errors = np.where(missing, self.penalty, errors)
+        return errors
+
 
 class FunctionEvaluator(Evaluator):
     """Evaluator driven by an error function."""
@@ -225,13 +478,20 @@ class FunctionEvaluator(Evaluator):
         self.error_function = error_function
 
     @tap
-    def evaluate(self, program: Program) -> np.ndarray:
+    def evaluate(self,
+                 program: Program,
+                 error_budget: Optional[float] = None,
+                 case_indices: Optional[Sequence[int]] = None) -> np.ndarray:
         """Evaluate the program and return the error vector.
 
         Parameters
         ----------
         program
             Program (CodeBlock of Push code) to evaluate.
+        error_budget
+            Ignored. The error function is always run in full.
+        case_indices
+            Ignored. The error function decides which cases it runs.
 
         Returns
         -------
@@ -239,5 +499,129 @@ class FunctionEvaluator(Evaluator):
             The error vector of the program.
 
         """
-        super().evaluate(program)
+        super().evaluate(program, error_budget, case_indices)
         return self.error_function(program)
+
+
+def _code_structure(atom: Atom):
+    # Nested tuples of plain values, so equal code has an equal repr whichever atom objects it shares.
+    if isinstance(atom, CodeBlock):
+        return tuple(_code_structure(a) for a in atom)
+    if isinstance(atom, InstructionMeta):
+        return "instruction", atom.name
+    if isinstance(atom, Input):
+        return "input", atom.input_index
+    if isinstance(atom, Literal):
+        return "literal", atom.push_type.name, type(atom.value).__name__, repr(atom.value)
+    return type(atom).__name__, repr(atom)
+
+
+class EvaluationCache:
+    """A bounded LRU cache of error vectors keyed by program code.
+
+    Programs are compared by their nested code, not by the genome they were
+    translated from, so genomes that only differ by ignored closers share an
+    entry. The code is keyed by a digest of its structure, the kind and value
+    of each atom with code blocks nested, so the key does not depend on which
+    atom objects the code shares. All programs put in one cache are assumed to
+    share a signature and to be evaluated on the same cases.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximum number of error vectors to keep. The least recently used
+        entry is evicted first. Default is 10000.
+
+    Attributes
+    ----------
+    hits : int
+        Number of programs whose error vector was found in the cache.
+    misses : int
+        Number of programs whose error vector was not found in the cache.
+
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._error_vectors = OrderedDict()
+
+    def __len__(self):
+        return len(self._error_vectors)
+
+    @staticmethod
+    def key(program: Program) -> bytes:
+        """Return the key of the program's code in the cache.
+
+        Keys are 16 byte digests, so they are cheap to store and compare.
+        """
+        structure = repr(_code_structure(program.code)).encode()
+        return hashlib.blake2b(structure, digest_size=16).digest()
+
+    def keys(self) -> List[bytes]:
+        """Return the keys of the cached programs, least recently used first."""
+        return list(self._error_vectors.keys())
+
+    def get(self, program: Optional[Program], key: Optional[bytes] = None) -> Optional[np.ndarray]:
+        """Return the cached error vector of the program or None if it is not cached.
+
+        The ``key`` of the program can be given if it is already known, and
+        the program can then be None.
+        """
+        if key is None:
+            key = self.key(program)
+        error_vector = self._error_vectors.get(key)
+        if error_vector is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._error_vectors.move_to_end(key)
+        return error_vector
+
+    def put(self, program: Optional[Program], error_vector: np.ndarray, key: Optional[bytes] = None):
+        """Cache the error vector of the program.
+
+        The ``key`` of the program can be given if it is already known, and
+        the program can then be None.
+        """
+        if key is None:
+            key = self.key(program)
+        self._error_vectors[key] = error_vector
+        self._error_vectors.move_to_end(key)
+        while len(self._error_vectors) > self.max_size:
+            self._error_vectors.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached error vectors. Does not reset the counters."""
+        self._error_vectors.clear()
+
+    def hit_rate(self) -> float:
+        """Proportion of lookups answered by the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+# Evaluator of a worker process. Set once per worker by the pool initializer.
+_worker_evaluator: Optional[Evaluator] = None
+
+
+def init_worker_evaluator(evaluator: Evaluator):
+    """Set the Evaluator used by ``evaluate_in_worker`` in the current worker process."""
+    global _worker_evaluator
+    _worker_evaluator = evaluator
+
+
+def evaluate_in_worker(program: Program,
+                       error_budget: Optional[float] = None,
+                       case_indices: Optional[np.ndarray] = None) -> np.ndarray:
+    """Evaluate the program with the Evaluator of the current worker process."""
+    return _worker_evaluator.evaluate(program, error_budget=error_budget, case_indices=case_indices)
+
+
+def evaluate_with_budget_in_worker(program: Program,
+                                   error_budget: Optional[float],
+                                   case_indices: Optional[np.ndarray] = None) -> Tuple[np.ndarray, bool]:
+    """Evaluate the program in the current worker process and report if the evaluation stopped early."""
+    error_vector = evaluate_in_worker(program, error_budget=error_budget, case_indices=case_indices)
+    return error_vector, _worker_evaluator.stopped_early
@@ -9,15 +9,21 @@ LastEditTime: 2022-02-18 16:26:56
 from __future__ import annotations
 
 from enum import Enum
-from typing import Sequence, Union, Any, Callable, Tuple
+from typing import Sequence, Union, Any, Callable, Tuple, Optional, List
+from multiprocessing import Pool
+from uuid import uuid4
+import os
+import pickle
+import weakref
 
 import numpy as np
-from pyrsistent import PRecord, field, CheckedPVector, l
+from pyrsistent import PRecord, field, CheckedPVector
 
-from pgsyn.gp.evaluation import Evaluator
+from pgsyn.gp.evaluation import Evaluator, evaluate_in_worker
 from pgsyn.push.instruction_set import InstructionSet
 from pgsyn.push.program import ProgramSignature, Program
 from pgsyn.push.atoms import Atom, CodeBlock, Closer, Literal, InstructionMeta, Input
+from pgsyn.push.atoms import intern_closer, intern_instruction_meta, intern_input
 from pgsyn.push.type_library import infer_literal
 from pgsyn.tap import tap
 from pgsyn.utils import DiscreteProbDistrib
@@ -33,13 +39,6 @@ class Opener(PRecord):
         return Opener(count=self.count - 1)
 
 
-def _has_opener(seq: Sequence) -> bool:
-    for el in seq:
-        if isinstance(el, Opener):
-            return True
-    return False
-
-
 class Genome(CheckedPVector):
     """A linear sequence of genes (aka any atom that isn't a ``CodeBlock``).
 
@@ -53,44 +52,321 @@ class Genome(CheckedPVector):
     __invariant__ = lambda a: (not isinstance(a, CodeBlock), 'CodeBlock')
 
 
-def genome_to_code(genome: Genome) -> CodeBlock:
+# GeneTables of this process, by token. Unpickled CompactGenomes find their table here.
+_gene_tables = weakref.WeakValueDictionary()
+
+
+def _restore_gene_table(token: str, atoms: list) -> GeneTable:
+    table = _gene_tables.get(token)
+    if table is None:
+        table = GeneTable(atoms, token=token)
+    return table
+
+
+class GeneTable:
+    """Numbers the distinct genes of a run.
+
+    The table starts with a fixed set of genes, usually the ``Closer``, the
+    inputs, the instructions and the literals of a ``GeneSpawner``. These have
+    the same code in every process that has a copy of the table. Other genes,
+    such as the values of ERCs, are interned as they are first seen and their
+    codes are local to the process. The codes of local genes that are no
+    longer used are freed by ``free_unused`` and given to new genes. The code
+    of a gene never changes while a ``CompactGenome`` uses it.
+
+    Parameters
+    ----------
+    atoms : Sequence[Atom]
+        The fixed genes of the table. The ``Closer`` is always code 0 and is
+        added if it is missing.
+    token : str, optional
+        Identifies the table across processes. Default is None, which creates a
+        new identity.
+
+    Attributes
+    ----------
+    atoms : List[Atom]
+        The gene of each code, or None if the code is free.
+    code_blocks : List[int]
+        The number of code blocks opened by the gene of each code.
+    n_fixed : int
+        The number of fixed genes, whose codes are shared across processes.
+
+    """
+
+    CLOSER = 0
+
+    def __init__(self, atoms: Sequence[Atom], token: Optional[str] = None):
+        self.token = token if token is not None else uuid4().hex
+        self.atoms = []
+        self.code_blocks = []
+        self._keys = []
+        self._codes = {}
+        self._free = []
+        # CompactGenomes of this table by id, to find the local codes in use.
+        self._genomes = weakref.WeakValueDictionary()
+        self.code_of(intern_closer())
+        for atom in atoms:
+            self.code_of(atom)
+        self.n_fixed = len(self.atoms)
+        _gene_tables[self.token] = self
+
+    def __len__(self):
+        return len(self.atoms)
+
+    def __reduce__(self):
+        return _restore_gene_table, (self.token, self.atoms[:self.n_fixed])
+
+    def code_of(self, atom: Atom) -> int:
+        """Return the code of the gene, adding it to the table if it is new."""
+        try:
+            key = atom
+            code = self._codes.get(key)
+        except TypeError:
+            # Unhashable genes, such as Char and vector literals, are keyed by their pickle.
+            key = pickle.dumps(atom)
+            code = self._codes.get(key)
+        if code is None:
+            n_code_blocks = atom.code_blocks if isinstance(atom, InstructionMeta) else 0
+            if len(self._free) > 0:
+                code = self._free.pop()
+                self.atoms[code] = atom
+                self.code_blocks[code] = n_code_blocks
+                self._keys[code] = key
+            else:
+                code = len(self.atoms)
+                self.atoms.append(atom)
+                self.code_blocks.append(n_code_blocks)
+                self._keys.append(key)
+            self._codes[key] = code
+        return code
+
+    def codes_of(self, atoms: Sequence[Atom]) -> np.ndarray:
+        """Return the codes of the genes as an array."""
+        return np.array([self.code_of(atom) for atom in atoms], dtype=np.int32)
+
+    def encode(self, genome: Sequence[Atom]) -> CompactGenome:
+        """Return the ``CompactGenome`` of a sequence of genes."""
+        return CompactGenome(self.codes_of(genome), self)
+
+    def free_unused(self) -> int:
+        """Free the codes of the local genes that no live ``CompactGenome`` of the table uses.
+
+        Freed codes are given to new genes. The codes of live CompactGenomes
+        are left unchanged, but codes held outside of a CompactGenome may
+        point to another gene afterwards, so this must only be called when
+        there are none, such as between two generations.
+
+        Returns
+        -------
+        int
+            The number of codes freed.
+
+        """
+        in_use = np.zeros(len(self.atoms), dtype=bool)
+        in_use[:self.n_fixed] = True
+        in_use[self._free] = True
+        genomes = list(self._genomes.values())
+        if len(genomes) > 0:
+            in_use[np.concatenate([genome.genes for genome in genomes])] = True
+        unused = np.flatnonzero(~in_use).tolist()
+        for code in unused:
+            del self._codes[self._keys[code]]
+            self.atoms[code] = None
+            self._keys[code] = None
+        self._free.extend(unused)
+        return len(unused)
+
+
+def _restore_compact_genome(token: str, data: bytes, dtype: str, local_codes: list, local_atoms: list):
+    table = _gene_tables.get(token)
+    if table is None:
+        raise ValueError("No GeneTable {t} in this process. Convert CompactGenomes with to_genome before "
+                         "moving them out of the run.".format(t=token))
+    genes = np.frombuffer(data, dtype=dtype).astype(np.int32)
+    if len(local_atoms) > 0:
+        is_local = genes >= table.n_fixed
+        genes[is_local] = table.codes_of(local_atoms)[np.searchsorted(local_codes, genes[is_local])]
+    return CompactGenome(genes, table)
+
+
+class CompactGenome:
+    """A Genome stored as an array of gene codes of a ``GeneTable``.
+
+    Holds the same genes as a ``Genome`` in a small fraction of the memory,
+    and is pickled as its codes plus the few genes whose codes are local to
+    the process. Iterating or indexing a CompactGenome gives Atoms, and
+    ``genome_to_code`` and the UMAD variation operators work on the codes
+    directly.
+
+    A CompactGenome can only be unpickled in a process that has its table,
+    which is the case for the workers of a ``ParallelContext``. Use
+    ``to_genome`` before saving it outside of the run.
+
+    Parameters
+    ----------
+    genes : np.ndarray
+        The code of each gene.
+    table : GeneTable
+        The GeneTable of the codes.
+
+    """
+
+    __slots__ = ["genes", "table", "__weakref__"]
+
+    def __init__(self, genes: np.ndarray, table: GeneTable):
+        self.genes = genes
+        self.table = table
+        table._genomes[id(self)] = self
+
+    def __len__(self):
+        return len(self.genes)
+
+    def __iter__(self):
+        atoms = self.table.atoms
+        return (atoms[code] for code in self.genes.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return CompactGenome(self.genes[key], self.table)
+        return self.table.atoms[self.genes[key]]
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactGenome) and self.table is other.table
+                and np.array_equal(self.genes, other.genes))
+
+    def __hash__(self):
+        return hash(self.genes.tobytes())
+
+    def __repr__(self):
+        return "CompactGenome({g})".format(g=list(self))
+
+    def __reduce__(self):
+        local_codes = np.unique(self.genes[self.genes >= self.table.n_fixed]).tolist()
+        local_atoms = [self.table.atoms[code] for code in local_codes]
+        # Codes are sent in the smallest integer type that fits the table.
+        dtype = np.min_scalar_type(len(self.table)).str
+        data = self.genes.astype(dtype).tobytes()
+        return _restore_compact_genome, (self.table.token, data, dtype, local_codes, local_atoms)
+
+    def delete(self, index: int, stop: Optional[int] = None) -> CompactGenome:
+        """Return a CompactGenome without the gene at ``index``, or the genes in ``[index, stop)``."""
+        if stop is None:
+            stop = index + 1
+        return CompactGenome(np.concatenate([self.genes[:index], self.genes[stop:]]), self.table)
+
+    def to_genome(self) -> Genome:
+        """Return the equivalent ``Genome``."""
+        return Genome(self)
+
+
+def _object_array(items: Sequence) -> np.ndarray:
+    # Filled one by one so that numpy does not unpack sequence-like items.
+    arr = np.empty(len(items), dtype=object)
+    for ndx, item in enumerate(items):
+        arr[ndx] = item
+    return arr
+
+
+def genome_to_code(genome: Union[Genome, CompactGenome]) -> CodeBlock:
     """Translate into nested CodeBlocks.
 
     These CodeBlocks can be considered the Push program representation of
     the Genome which can be executed by a PushInterpreter and evaluated
     by an Evaluator.
 
+    The genome is read once, left to right. Each instruction that opens code
+    blocks pushes a new block on a stack of open blocks, and each ``Closer``
+    pops the innermost one into its parent. Blocks still open at the end of
+    the genome are closed implicitly.
+
     """
-    plushy_buffer = l()
-    for atom in genome[::-1]:
+    if isinstance(genome, CompactGenome):
+        return _compact_genome_to_code(genome)
+    # Each open block is its list of atoms and the number of blocks its
+    # instruction still has to open, including itself.
+    blocks = [[]]
+    remaining = [0]
+    for atom in genome:
+        if isinstance(atom, Closer):
+            # A close without an open block is ignored.
+            if len(blocks) > 1:
+                _close_block(blocks, remaining)
+            continue
+        blocks[-1].append(atom)
         if isinstance(atom, InstructionMeta) and atom.code_blocks > 0:
-            plushy_buffer = plushy_buffer.cons(Opener(count=atom.code_blocks))
-        plushy_buffer = plushy_buffer.cons(atom)
-
-    push_buffer = []
-    while True:
-        # If done with plush but unclosed opens, recur with one more close.
-        if len(plushy_buffer) == 0 and _has_opener(push_buffer):
-            plushy_buffer = plushy_buffer.cons(Closer())
-        # If done with plush and all opens closed, return push.
-        elif len(plushy_buffer) == 0:
-            return CodeBlock(push_buffer)
-        else:
-            atom = plushy_buffer.first
-            plushy_buffer = plushy_buffer.rest
-            # If next instruction is a close, and there is an open.
-            if isinstance(atom, Closer) and _has_opener(push_buffer):
-                ndx, opener = [(ndx, el) for ndx, el in enumerate(push_buffer) if isinstance(el, Opener)][-1]
-                post_open = push_buffer[ndx + 1:]
-                pre_open = push_buffer[:ndx]
-                push_buffer = pre_open + [CodeBlock(post_open)]
-                if opener.count > 1:
-                    opener = opener.dec()
-                    push_buffer.append(opener)
-            # If next instruction is a close, and there is no open, ignore it.
-            # If next instruction is not a close.
-            elif not isinstance(atom, Closer):
-                push_buffer.append(atom)
+            blocks.append([])
+            remaining.append(atom.code_blocks)
+    while len(blocks) > 1:
+        _close_block(blocks, remaining)
+    return CodeBlock(blocks[0])
+
+
+def _compact_genome_to_code(genome: CompactGenome) -> CodeBlock:
+    # Same as genome_to_code, reading the gene kinds from the table.
+    atoms = genome.table.atoms
+    code_blocks = genome.table.code_blocks
+    blocks = [[]]
+    remaining = [0]
+    for code in genome.genes.tolist():
+        if code == GeneTable.CLOSER:
+            if len(blocks) > 1:
+                _close_block(blocks, remaining)
+            continue
+        blocks[-1].append(atoms[code])
+        if code_blocks[code] > 0:
+            blocks.append([])
+            remaining.append(code_blocks[code])
+    while len(blocks) > 1:
+        _close_block(blocks, remaining)
+    return CodeBlock(blocks[0])
+
+
+def _close_block(blocks: list, remaining: list):
+    block = blocks.pop()
+    count = remaining.pop()
+    blocks[-1].append(CodeBlock(block))
+    if count > 1:
+        blocks.append([])
+        remaining.append(count - 1)
+
+
+def _block_spans(genome: Genome) -> list:
+    """Return the ``(start, stop)`` genome slices of the instructions that open code blocks.
+
+    Each slice starts at the instruction and ends after the ``Closer`` of its
+    last block, or at the end of the genome if that block is closed implicitly.
+    Closers are matched the same way as in ``genome_to_code``.
+
+    """
+    spans = []
+    opened = []
+    for ndx, atom in enumerate(genome):
+        if isinstance(atom, Closer):
+            if len(opened) > 0:
+                opened[-1][1] -= 1
+                if opened[-1][1] == 0:
+                    spans.append((opened.pop()[0], ndx + 1))
+        elif isinstance(atom, InstructionMeta) and atom.code_blocks > 0:
+            opened.append([ndx, atom.code_blocks])
+    spans.extend((start, len(genome)) for start, _ in opened)
+    return spans
+
+
+def _deletion_spans(genome: Genome, chunk_size: int) -> list:
+    """Return the slices of the genome to try deleting, right to left.
+
+    Consecutive chunks are used while ``chunk_size`` is larger than one. Otherwise
+    the slices are the code blocks and the single genes of the genome.
+
+    """
+    n = len(genome)
+    if chunk_size > 1:
+        spans = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    else:
+        spans = _block_spans(genome) + [(ndx, ndx + 1) for ndx in range(n)]
+    # Larger slices first among the slices with the same start.
+    return sorted(spans, reverse=True)
 
 
 class GeneTypes(Enum):
@@ -132,6 +408,9 @@ class GeneSpawner:
     distribution : pyshgp.utils.DiscreteProbDistrib
         A probability distribution describing how frequently to produce
         Instructions, Closers, Literals, and ERCs.
+    gene_table : GeneTable
+        Numbers the genes of compact genomes. Starts with the inputs,
+        instructions and literals of the spawner.
 
     """
 
@@ -162,6 +441,26 @@ class GeneSpawner:
         else:
             self.distribution = distribution
 
+        # Genes are immutable, so spawned genes share the interned instances.
+        self._inputs = [intern_input(ndx) for ndx in range(self.n_inputs)]
+        self._instructions = [intern_instruction_meta(i.name, i.code_blocks) for i in self.instruction_set.values()]
+        self._closer = intern_closer()
+        self.gene_table = GeneTable(self._inputs + self._instructions + self.literals)
+        self._gene_pools = (
+            _object_array(self._inputs),
+            _object_array(self._instructions),
+            self._closer,
+            _object_array(self.literals),
+            self._erc_gene
+        )
+        self._code_pools = (
+            self.gene_table.codes_of(self._inputs),
+            self.gene_table.codes_of(self._instructions),
+            GeneTable.CLOSER,
+            self.gene_table.codes_of(self.literals),
+            self._erc_code
+        )
+
     def random_input(self) -> Input:
         """Return a random ``Input``.
 
@@ -170,7 +469,7 @@ class GeneSpawner:
         pyshgp.push.atoms.Input
 
         """
-        return Input(input_index=np.random.randint(self.n_inputs))
+        return self._inputs[np.random.randint(self.n_inputs)]
 
     def random_instruction(self) -> InstructionMeta:
         """Return a random Instruction from the InstructionSet.
@@ -181,8 +480,7 @@ class GeneSpawner:
             A randomly selected Literal.
 
         """
-        i = np.random.choice(list(self.instruction_set.values()))
-        return InstructionMeta(name=i.name, code_blocks=i.code_blocks)
+        return self._instructions[np.random.randint(len(self._instructions))]
 
     def random_literal(self) -> Literal:
         """Return a random Literal from the set of Literals.
@@ -207,10 +505,7 @@ class GeneSpawner:
             A Literal whose value comes from running a ERC generator function.
 
         """
-        erc_value = np.random.choice(self.erc_generators)()
-        if not isinstance(erc_value, Literal):
-            erc_value = infer_literal(erc_value, self.type_library)
-        return erc_value
+        return self._erc_gene(np.random.choice(self.erc_generators)())
 
     def random_gene(self) -> Atom:
         """Return a random Atom based on the GenomeSpawner's distribution.
@@ -227,7 +522,7 @@ class GeneSpawner:
         elif atom_type is GeneTypes.INSTRUCTION:
             return self.random_instruction()
         elif atom_type is GeneTypes.CLOSE:
-            return Closer()
+            return self._closer
         elif atom_type is GeneTypes.LITERAL:
             return self.random_literal()
         elif atom_type is GeneTypes.ERC:
@@ -235,7 +530,80 @@ class GeneSpawner:
         else:
             raise ValueError("GenomeSpawner distribution bad atom type {t}".format(t=str(atom_type)))
 
-    def spawn_genome(self, size: Union[int, Sequence[int]]) -> Genome:
+    def _erc_gene(self, erc_value: Any) -> Literal:
+        if not isinstance(erc_value, Literal):
+            erc_value = infer_literal(erc_value, self.type_library)
+        return erc_value
+
+    def _erc_code(self, erc_value: Any) -> int:
+        return self.gene_table.code_of(self._erc_gene(erc_value))
+
+    def _spawn(self, n: int, pools: tuple, out: np.ndarray) -> np.ndarray:
+        # Sample the kind of every gene at once, then the genes of each kind at once.
+        inputs, instructions, closer, literals, erc = pools
+        if n == 0:
+            return out
+        kinds = np.asarray(self.distribution.sample_n(n))
+        filled = np.zeros(n, dtype=bool)
+        for kind, pool in [(GeneTypes.INPUT, inputs), (GeneTypes.INSTRUCTION, instructions),
+                           (GeneTypes.LITERAL, literals)]:
+            ndx = np.flatnonzero(kinds == kind)
+            if len(ndx) > 0:
+                out[ndx] = pool[np.random.randint(len(pool), size=len(ndx))]
+                filled[ndx] = True
+        ndx = np.flatnonzero(kinds == GeneTypes.CLOSE)
+        out[ndx] = closer
+        filled[ndx] = True
+        ndx = np.flatnonzero(kinds == GeneTypes.ERC)
+        if len(ndx) > 0:
+            generators = np.random.randint(len(self.erc_generators), size=len(ndx))
+            for pos, gen in zip(ndx.tolist(), generators.tolist()):
+                out[pos] = erc(self.erc_generators[gen]())
+            filled[ndx] = True
+        if not filled.all():
+            atom_type = kinds[np.flatnonzero(~filled)[0]]
+            raise ValueError("GenomeSpawner distribution bad atom type {t}".format(t=str(atom_type)))
+        return out
+
+    def spawn_genes(self, n: int) -> List[Atom]:
+        """Return a list of random Atoms based on the GenomeSpawner's distribution.
+
+        Draws the same distribution of genes as calling ``random_gene`` ``n``
+        times, using one vectorized draw per kind of gene.
+
+        Parameters
+        ----------
+        n
+            The number of genes to spawn.
+
+        Returns
+        -------
+        List[pyshgp.push.atoms.Atom]
+            The random Atoms.
+
+        """
+        return self._spawn(n, self._gene_pools, np.empty(n, dtype=object)).tolist()
+
+    def spawn_gene_codes(self, n: int) -> np.ndarray:
+        """Return the ``gene_table`` codes of random genes.
+
+        Consumes random numbers exactly like ``spawn_genes``, so both give the
+        same genes for the same seed.
+
+        Parameters
+        ----------
+        n
+            The number of genes to spawn.
+
+        Returns
+        -------
+        np.ndarray
+            The codes of the random genes.
+
+        """
+        return self._spawn(n, self._code_pools, np.empty(n, dtype=np.int32))
+
+    def spawn_genome(self, size: Union[int, Sequence[int]], compact: bool = False) -> Union[Genome, CompactGenome]:
         """Return a random Genome based on the GenomeSpawner's distribution.
 
         The genome will contain the specified number of Atoms if size is an
@@ -248,6 +616,9 @@ class GeneSpawner:
             The resulting genome will contain this many Atoms if size is an
             integer. If size is a pair of integers, the genome will be of a random
             size in the range of the two integers.
+        compact
+            If True, return a ``CompactGenome`` of the spawner's ``gene_table``.
+            Default is False.
 
         Returns
         -------
@@ -257,7 +628,9 @@ class GeneSpawner:
         """
         if isinstance(size, Sequence):
             size = np.random.randint(size[0], size[1]) + 1
-        return Genome([self.random_gene() for _ in range(size)])
+        if compact:
+            return CompactGenome(self.spawn_gene_codes(size), self.gene_table)
+        return Genome(self.spawn_genes(size))
 
 
 class GenomeSimplifier:
@@ -277,6 +650,38 @@ class GenomeSimplifier:
     for some number of steps, the resulting genome will be the same size or
     smaller while containing the same (or better) error value.
 
+    If a pool is given, each iteration instead proposes one random removal per
+    candidate, evaluates all candidates concurrently, and keeps the one with
+    the lowest error (the shortest on ties) if it is not worse. Each candidate
+    counts as one step, so the number of evaluations is unchanged. The pool
+    workers must have been initialized with
+    ``pgsyn.gp.evaluation.init_worker_evaluator``.
+
+    The ``"sweep"`` strategy removes genes systematically instead. It tries
+    deleting consecutive chunks of genes, halving the chunk size each pass, and
+    then every code block and every single gene, from the end of the genome to
+    its start. A deletion that worsens the error is remembered and never tried
+    again, and a deletion that leaves the Push code unchanged is kept without
+    evaluating it. The sweep ends when a pass keeps no deletion, so the number
+    of evaluations is bounded by a small multiple of the genome length rather
+    than by ``steps``. The sweep is always serial.
+
+    Parameters
+    ----------
+    evaluator : Evaluator
+        The Evaluator used to compute the errors of simplified genomes.
+    program_signature : ProgramSignature
+        The signature of the programs translated from the genomes.
+    pool : Pool, optional
+        Process pool used to evaluate candidates concurrently. Default is None,
+        which simplifies serially.
+    n_candidates : int, optional
+        Number of candidates evaluated per iteration when a pool is given.
+        Default is None, which uses the number of CPUs.
+    strategy : str, optional
+        Either ``"random"``, which removes random genes, or ``"sweep"``, which
+        sweeps deletions over the genome. Default is ``"random"``.
+
     Reference:
     "Improving generalization of evolved programs through automatic simplification"
     Thomas Helmuth, Nicholas Freitag McPhee, Edward Pantridge, and Lee Spector. 2017.
@@ -291,9 +696,17 @@ class GenomeSimplifier:
 
     def __init__(self,
                  evaluator: Evaluator,
-                 program_signature: ProgramSignature):
+                 program_signature: ProgramSignature,
+                 pool: Optional[Pool] = None,
+                 n_candidates: Optional[int] = None,
+                 strategy: str = "random"):
+        if strategy not in ("random", "sweep"):
+            raise ValueError("Unknown simplification strategy {s}.".format(s=strategy))
         self.evaluator = evaluator
         self.program_signature = program_signature
+        self.pool = pool
+        self.n_candidates = n_candidates or os.cpu_count()
+        self.strategy = strategy
 
     def _remove_rand_genes(self, genome: Genome) -> Genome:
         # @todo DRY with deletion variation operator.
@@ -305,10 +718,11 @@ class GenomeSimplifier:
             gn = gn.delete(ndx)
         return gn
 
+    def _program_of_genome(self, genome: Genome) -> Program:
+        return Program(code=genome_to_code(genome), signature=self.program_signature)
+
     def _errors_of_genome(self, genome: Genome) -> np.ndarray:
-        cb = genome_to_code(genome)
-        program = Program(code=cb, signature=self.program_signature)
-        return self.evaluator.evaluate(program)
+        return self.evaluator.evaluate(self._program_of_genome(genome))
 
     @tap
     def _step(self, genome: Genome, errors_to_beat: np.ndarray) -> Tuple[Genome, np.ndarray]:
@@ -318,6 +732,69 @@ class GenomeSimplifier:
             return new_gn, new_errs
         return genome, errors_to_beat
 
+    @tap
+    def _p_step(self, genome: Genome, errors_to_beat: np.ndarray) -> Tuple[Genome, np.ndarray]:
+        candidates = [self._remove_rand_genes(genome) for _ in range(self.n_candidates)]
+        programs = [self._program_of_genome(gn) for gn in candidates]
+        best_gn, best_errs = genome, errors_to_beat
+        best_key = (np.sum(errors_to_beat), len(genome))
+        for gn, errs in zip(candidates, self.pool.map(evaluate_in_worker, programs)):
+            key = (np.sum(errs), len(gn))
+            if key[0] <= best_key[0] and (best_gn is genome or key < best_key):
+                best_gn, best_errs, best_key = gn, errs, key
+        return best_gn, best_errs
+
+    @tap
+    def _sweep_step(self, genome: Genome, errors_to_beat: np.ndarray, new_gn: Genome) -> Tuple[Genome, np.ndarray]:
+        new_errs = self._errors_of_genome(new_gn)
+        if np.sum(new_errs) <= np.sum(errors_to_beat):
+            return new_gn, new_errs
+        return genome, errors_to_beat
+
+    def _sweep(self, genome: Genome, errors: np.ndarray, max_evaluations: int) -> Tuple[Genome, np.ndarray]:
+        gn, errs = genome, errors
+        code = genome_to_code(gn)
+        # Original position of each remaining gene. Rejected deletions are
+        # remembered by the original positions of their first and last genes.
+        ids = list(range(len(gn)))
+        rejected = set()
+        n_evaluations = 0
+        chunk_size = len(gn) // 2
+        while len(gn) > 1 and n_evaluations < max_evaluations:
+            kept_any = False
+            spans = _deletion_spans(gn, chunk_size)
+            ndx = 0
+            while ndx < len(spans) and n_evaluations < max_evaluations:
+                start, stop = spans[ndx]
+                ndx += 1
+                key = (stop - start > 1, ids[start], ids[stop - 1])
+                if key in rejected or stop - start >= len(gn):
+                    continue
+                new_gn = gn.delete(start, stop)
+                if not isinstance(new_gn, CompactGenome):
+                    new_gn = Genome(new_gn)
+                new_code = genome_to_code(new_gn)
+                if new_code == code:
+                    # The deleted genes did not contribute to the Push code.
+                    gn = new_gn
+                else:
+                    n_evaluations += 1
+                    kept_gn, errs = self._sweep_step(gn, errs, new_gn)
+                    if kept_gn is gn:
+                        rejected.add(key)
+                        continue
+                    gn, code = new_gn, new_code
+                del ids[start:stop]
+                kept_any = True
+                # Slices after the deletion were already tried in this pass.
+                spans = [sp for sp in _deletion_spans(gn, chunk_size) if sp[0] < start]
+                ndx = 0
+            if chunk_size > 1:
+                chunk_size //= 2
+            elif not kept_any:
+                break
+        return gn, errs
+
     @tap
     def simplify(self,
                  genome: Genome,
@@ -332,7 +809,8 @@ class GenomeSimplifier:
         original_errors
             Error vector of the genome to simplify.
         steps
-            Number of simplification iterations to perform. Default is 2000.
+            Number of simplification iterations to perform. For the ``"sweep"``
+            strategy, the maximum number of evaluations. Default is 2000.
 
         Returns
         -------
@@ -342,6 +820,14 @@ class GenomeSimplifier:
         """
         gn = genome
         errs = original_errors
+        if self.strategy == "sweep":
+            return self._sweep(gn, errs, steps)
+        if self.pool is not None:
+            for step in range(0, steps, self.n_candidates):
+                gn, errs = self._p_step(gn, errs)
+                if len(gn) == 1:
+                    break
+            return gn, errs
         for step in range(steps):
             gn, errs = self._step(gn, errs)
             if len(gn) == 1:
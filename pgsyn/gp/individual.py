@@ -29,12 +29,15 @@ class Individual(Saveable, Copyable):
         The sum of all error values in the Individual's error_vector.
     error_vector_bytes:
         Hashable Byte representation of the Individual's error vector.
+    truncated : bool
+        True if the evaluation of the Individual's program was cut short by an
+        error budget, so the rest of its error vector is filled with penalties.
 
     """
 
     __slots__ = [
         "id", "genome", "signature",
-        "_program", "_error_vector", "_total_error", "_error_vector_bytes"
+        "_program", "_error_vector", "_total_error", "_error_vector_bytes", "truncated"
     ]
 
     def __init__(self, genome: Genome, signature: ProgramSignature):
@@ -45,6 +48,7 @@ class Individual(Saveable, Copyable):
         self._error_vector = None
         self._total_error = None
         self._error_vector_bytes = None
+        self.truncated = False
 
     @property
     def program(self) -> Program:
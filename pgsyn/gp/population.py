@@ -8,29 +8,42 @@ LastEditTime: 2022-02-18 16:27:32
 
 from collections.abc import Sequence
 from bisect import insort_left
+from itertools import count
+from typing import Optional, Callable, Iterable, List, Tuple
 import numpy as np
 import pickle
-from multiprocessing import Pool
 from functools import partial
+from multiprocessing import Pool
 
 from pgsyn.gp.individual import Individual
-from pgsyn.gp.evaluation import Evaluator
+from pgsyn.gp.genome import CompactGenome
+from pgsyn.gp.evaluation import Evaluator, EvaluationCache, evaluate_with_budget_in_worker
+from pgsyn.push.program import Program
 from pgsyn.tap import tap
 
 
-def _eval_indiv(indiv: Individual, evalr: Evaluator, ):
-    indiv.error_vector = evalr.evaluate(indiv.program)
-    return indiv
+# Shared by all populations, so a version token is never reused.
+_versions = count()
 
 
 class Population(Sequence):
-    """A sequence of Individuals kept in sorted order, with respect to their total errors."""
+    """A sequence of Individuals kept in sorted order, with respect to their total errors.
+
+    Attributes
+    ----------
+    version : int
+        A token which changes whenever an Individual is added or evaluated.
+        Tokens are never reused, even across populations, so they can be
+        used to cache results computed from a population.
+
+    """
 
-    __slots__ = ["unevaluated", "evaluated"]
+    __slots__ = ["unevaluated", "evaluated", "version"]
 
     def __init__(self, individuals: list = None):
         self.unevaluated = []
         self.evaluated = []
+        self.version = next(_versions)
 
         if individuals is not None:
             for el in individuals:
@@ -50,6 +63,7 @@ class Population(Sequence):
             self.unevaluated.append(individual)
         else:
             insort_left(self.evaluated, individual)
+        self.version = next(_versions)
         return self
 
     def best(self):
@@ -60,21 +74,110 @@ class Population(Sequence):
         """Return the best n individuals in the population."""
         return self.evaluated[:n]
 
-    @tap
-    def p_evaluate(self, evaluator_proxy, pool: Pool):
-        """Evaluate all unevaluated individuals in the population in parallel."""
-        func = partial(_eval_indiv, evalr=evaluator_proxy)
-        for individual in pool.imap_unordered(func, self.unevaluated):
-            insort_left(self.evaluated, individual)
+    def _error_budget(self, selectable: Optional[int]) -> Optional[float]:
+        if selectable is None or len(self.evaluated) < selectable:
+            return None
+        return self.evaluated[selectable - 1].total_error
+
+    def _evaluate_unevaluated(self,
+                              evaluate_programs: Callable[[List[Program], Optional[float]],
+                                                          Iterable[Tuple[np.ndarray, bool]]],
+                              cache: Optional[EvaluationCache],
+                              selectable: Optional[int],
+                              wave_size: int):
+        # Individuals are grouped by program so each distinct program is evaluated at most once.
+        groups = {}
+        for individual in self.unevaluated:
+            key = id(individual) if cache is None else cache.key(individual.program)
+            groups.setdefault(key, []).append(individual)
+        pending = []
+        for key, group in groups.items():
+            error_vector = None
+            if cache is not None:
+                cache.hits += len(group) - 1
+                error_vector = cache.get(group[0].program, key)
+            if error_vector is None:
+                pending.append((key, group))
+            else:
+                self._add_evaluated(group, error_vector)
+
+        # The error budget is refreshed between waves as better individuals come in.
+        for start in range(0, len(pending), wave_size):
+            wave = pending[start:start + wave_size]
+            budget = self._error_budget(selectable)
+            results = evaluate_programs([group[0].program for _, group in wave], budget)
+            for (key, group), (error_vector, truncated) in zip(wave, results):
+                # Error vectors cut short by the budget are not the program's true errors.
+                if cache is not None and not truncated:
+                    cache.put(group[0].program, error_vector, key)
+                self._add_evaluated(group, error_vector, truncated)
         self.unevaluated = []
 
-    @tap
-    def evaluate(self, evaluator: Evaluator):
-        """Evaluate all unevaluated individuals in the population."""
-        for individual in self.unevaluated:
-            individual = _eval_indiv(individual, evaluator)
+    def _add_evaluated(self, individuals: List[Individual], error_vector: np.ndarray, truncated: bool = False):
+        for individual in individuals:
+            individual.error_vector = error_vector
+            individual.truncated = truncated
             insort_left(self.evaluated, individual)
-        self.unevaluated = []
+        self.version = next(_versions)
+
+    @tap
+    def p_evaluate(self,
+                   pool: Pool,
+                   cache: Optional[EvaluationCache] = None,
+                   selectable: Optional[int] = None,
+                   wave_size: int = 64,
+                   case_indices: Optional[np.ndarray] = None):
+        """Evaluate all unevaluated individuals in the population in parallel.
+
+        The workers of ``pool`` must have been initialized with
+        ``pgsyn.gp.evaluation.init_worker_evaluator``. Only programs are sent
+        to the workers and only error vectors are sent back. If a cache is
+        given, it is consulted before dispatching, so cached programs never
+        reach the workers.
+
+        If ``selectable`` is given, only that many of the best individuals can
+        be selected as parents. Programs are then dispatched in waves of
+        ``wave_size`` and evaluated with the total error of the current
+        ``selectable``-th best individual as error budget. Individuals whose
+        evaluation the evaluator stopped early are marked as ``truncated``.
+
+        If ``case_indices`` is given, programs are only evaluated on those
+        training cases. The caller is responsible for not mixing error vectors
+        of different case subsets, in the population or in the cache.
+
+        """
+        def evaluate_programs(programs, error_budget):
+            return pool.imap(partial(evaluate_with_budget_in_worker, error_budget=error_budget,
+                                     case_indices=case_indices),
+                             programs)
+
+        if selectable is None:
+            wave_size = max(len(self.unevaluated), 1)
+        self._evaluate_unevaluated(evaluate_programs, cache, selectable, wave_size)
+
+    @tap
+    def evaluate(self,
+                 evaluator: Evaluator,
+                 cache: Optional[EvaluationCache] = None,
+                 selectable: Optional[int] = None,
+                 case_indices: Optional[np.ndarray] = None):
+        """Evaluate all unevaluated individuals in the population.
+
+        If a cache is given, programs found in it are not evaluated again. If
+        ``selectable`` is given, only that many of the best individuals can be
+        selected as parents, and each program is evaluated with the total error
+        of the current ``selectable``-th best individual as error budget.
+        Individuals whose evaluation the evaluator stopped early are marked as
+        ``truncated``. If ``case_indices`` is given, programs are only evaluated
+        on those training cases.
+
+        """
+        def evaluate_programs(programs, error_budget):
+            return [(evaluator.evaluate(p, error_budget=error_budget, case_indices=case_indices),
+                     evaluator.stopped_early)
+                    for p in programs]
+
+        self._evaluate_unevaluated(evaluate_programs, cache, selectable, 1)
 
     def all_error_vectors(self):
         """2D array containing all Individuals' error vectors."""
@@ -84,17 +187,29 @@ class Population(Sequence):
         """1D array containing all Individuals' total errors."""
         return np.array([i.total_error for i in self.evaluated])
 
+    def fully_evaluated(self) -> List[Individual]:
+        """Evaluated Individuals whose evaluation was not cut short by an error budget."""
+        return [i for i in self.evaluated if not i.truncated]
+
     def median_error(self):
-        """Median total error in the population."""
-        return np.median(self.all_total_errors())
+        """Median total error of the fully evaluated Individuals in the population."""
+        individuals = self.fully_evaluated()
+        if len(individuals) == 0:
+            return np.nan
+        return np.median([i.total_error for i in individuals])
 
     def error_diversity(self):
-        """Proportion of unique error vectors."""
-        return len(np.unique(self.all_error_vectors(), axis=0)) / float(len(self))
+        """Proportion of unique error vectors among the fully evaluated Individuals."""
+        individuals = self.fully_evaluated()
+        if len(individuals) == 0:
+            return np.nan
+        return len(np.unique([i.error_vector for i in individuals], axis=0)) / float(len(individuals))
 
     def genome_diversity(self):
         """Proportion of unique genomes."""
-        unq = set([pickle.dumps(i.genome) for i in self])
+        # Equal genes share a code, so compact genomes are compared by their codes.
+        unq = set([i.genome.genes.tobytes() if isinstance(i.genome, CompactGenome) else pickle.dumps(i.genome)
+                   for i in self])
         return len(unq) / float(len(self))
 
     def program_diversity(self):
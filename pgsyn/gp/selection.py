@@ -8,7 +8,7 @@ LastEditTime: 2022-02-18 16:28:22
 
 from abc import ABC, abstractmethod
 from copy import copy
-from typing import Sequence, Union
+from typing import Sequence, Union, Optional, List, Tuple
 from operator import attrgetter
 
 import numpy as np
@@ -60,6 +60,67 @@ class Selector(ABC):
         """
         pass
 
+    def select_parents(self, population: Population, n_children: int, num_parents: int) -> List[Sequence[Individual]]:
+        """Return the parents of each of ``n_children`` children.
+
+        All parents are drawn with a single call to ``select``.
+
+        Parameters
+        ----------
+        population : Population
+            A Population of Individuals.
+        n_children : int
+            The number of children to select parents for.
+        num_parents : int
+            The number of parents of each child.
+
+        Returns
+        -------
+        List[Sequence[Individual]]
+            One sequence of ``num_parents`` Individuals per child.
+
+        """
+        selected = self.select(population, n_children * num_parents)
+        return [selected[start:start + num_parents] for start in range(0, len(selected), num_parents)]
+
+    def selectable_count(self, population_size: int, n: int = 1) -> Optional[int]:
+        """Return how many of the best individuals can ever be selected.
+
+        Individuals ranked below this count by total error are never returned
+        by ``select``, so their exact errors do not matter.
+
+        Parameters
+        ----------
+        population_size : int
+            The number of individuals in the population.
+        n : int
+            The number of parents selected per call to ``select``. Default is 1.
+
+        Returns
+        -------
+        Optional[int]
+            The number of selectable individuals, or None if any individual can
+            be selected.
+
+        """
+        return None
+
+    def sample_cases(self, n_cases: Optional[int]) -> Optional[np.ndarray]:
+        """Return the indices of the training cases to evaluate this generation.
+
+        Parameters
+        ----------
+        n_cases : Optional[int]
+            The number of training cases of the evaluator, or None if unknown.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Sorted indices of the training cases, or None to evaluate all of them.
+
+        """
+        return None
+
 
 class SimpleMultiSelectorMixin:
     """A mixin for ``Selector`` classes where selecting many individuals is done by repeated calls to `select_one`."""
@@ -173,6 +234,10 @@ class Tournament(SimpleMultiSelectorMixin, Selector):
         tournament = choice(population, self.tournament_size, replace=False)
         return min(tournament, key=attrgetter('total_error'))
 
+    def selectable_count(self, population_size: int, n: int = 1) -> Optional[int]:
+        """Return how many of the best individuals can ever win a tournament."""
+        return max(1, population_size - self.tournament_size + 1)
+
 
 def median_absolute_deviation(x: np.ndarray) -> np.float64:
     """Return the MAD.
@@ -221,7 +286,112 @@ def one_individual_per_error_vector(population: Population) -> Sequence[Individu
     return preselected
 
 
-class Lexicase(SimpleMultiSelectorMixin, Selector):
+def group_error_vectors(error_matrix: np.ndarray) -> Tuple[List[List[int]], np.ndarray]:
+    """Group the rows of an error matrix with identical error vectors.
+
+    Parameters
+    ----------
+    error_matrix : np.ndarray
+        2D array where each row is the error vector of an individual.
+
+    Returns
+    -------
+    Tuple[List[List[int]], np.ndarray]
+        The row indices of each group, and the errors of each group with one
+        contiguous row per case.
+
+    """
+    error_matrix = np.asarray(error_matrix)
+    groups = {}
+    for ndx, row in enumerate(error_matrix):
+        groups.setdefault(row.tobytes(), []).append(ndx)
+    groups = list(groups.values())
+    # One contiguous array per case makes the column lookups cheap.
+    case_errors = np.ascontiguousarray(error_matrix[[g[0] for g in groups]].T)
+    return groups, case_errors
+
+
+def lexicase_select_groups(groups: List[List[int]],
+                           case_errors: np.ndarray,
+                           n: int = 1,
+                           epsilon: Union[float, np.ndarray] = 0.0,
+                           random_state: np.random.RandomState = None) -> np.ndarray:
+    """Perform ``n`` lexicase selections over grouped error vectors.
+
+    Parameters
+    ----------
+    groups : List[List[int]]
+        The row indices of each group of identical error vectors, as returned
+        by ``group_error_vectors``.
+    case_errors : np.ndarray
+        The errors of each group with one row per case, as returned by
+        ``group_error_vectors``.
+    n : int
+        The number of selections to perform. Default is 1.
+    epsilon : Union[float, np.ndarray]
+        Tolerance added to the best error of each case. Either one value for
+        all cases or one value per case. Default is 0.0.
+    random_state : np.random.RandomState, optional
+        Source of randomness. Default is the global numpy random state.
+
+    Returns
+    -------
+    np.ndarray
+        The row indices of the selected individuals.
+
+    """
+    rng = np.random if random_state is None else random_state
+    n_cases = case_errors.shape[0]
+    epsilon = np.broadcast_to(epsilon, (n_cases,))
+    all_candidates = np.arange(len(groups))
+
+    selected = np.empty(n, dtype=int)
+    for s in range(n):
+        candidates = all_candidates
+        for case in rng.permutation(n_cases):
+            if len(candidates) <= 1:
+                break
+            errors_this_case = case_errors[case][candidates]
+            max_error = errors_this_case.min() + epsilon[case]
+            candidates = candidates[errors_this_case <= max_error]
+        group = groups[candidates[rng.randint(len(candidates))]]
+        selected[s] = group[rng.randint(len(group))]
+    return selected
+
+
+def lexicase_select_indices(error_matrix: np.ndarray,
+                            n: int = 1,
+                            epsilon: Union[float, np.ndarray] = 0.0,
+                            random_state: np.random.RandomState = None) -> np.ndarray:
+    """Perform ``n`` lexicase selections over the rows of an error matrix.
+
+    Rows with identical error vectors are grouped before filtering, which does
+    not change the probability of any row being selected. Each selection
+    shuffles the case indices and filters the surviving groups column by column.
+
+    Parameters
+    ----------
+    error_matrix : np.ndarray
+        2D array where each row is the error vector of an individual.
+    n : int
+        The number of selections to perform. Default is 1.
+    epsilon : Union[float, np.ndarray]
+        Tolerance added to the best error of each case. Either one value for
+        all cases or one value per case. Default is 0.0.
+    random_state : np.random.RandomState, optional
+        Source of randomness. Default is the global numpy random state.
+
+    Returns
+    -------
+    np.ndarray
+        The row indices of the selected individuals.
+
+    """
+    groups, case_errors = group_error_vectors(error_matrix)
+    return lexicase_select_groups(groups, case_errors, n, epsilon, random_state)
+
+
+class Lexicase(Selector):
     """Lexicase Selection.
 
     All training cases are considered iteratively in a random order. For each
@@ -231,38 +401,51 @@ class Lexicase(SimpleMultiSelectorMixin, Selector):
     or all cases have been used. After the filtering iterations, a random
     Individual from the remaining set is returned as the selected Individual.
 
+    The grouped error vectors (and the MAD epsilons of epsilon lexicase) of a
+    population are computed once and reused for every selection until the
+    ``version`` of the population changes.
+
     See: https://ieeexplore.ieee.org/document/6920034
+
+    Parameters
+    ----------
+    epsilon : Union[bool, float, np.ndarray], optional
+        If True, the epsilon of each case is the median absolute deviation of
+        the population's errors on it. A number or an array of numbers is used
+        as the epsilon directly. Default is False.
+    seed : int, optional
+        Seed of the selector's own random state. Default is None, which uses
+        the global numpy random state.
+
     """
 
-    def __init__(self, epsilon: Union[bool, float, np.ndarray] = False):
+    def __init__(self, epsilon: Union[bool, float, np.ndarray] = False, seed: Optional[int] = None):
         self.epsilon = epsilon
+        self.random_state = None if seed is None else np.random.RandomState(seed)
+        self._population_version = None
+        self._groups = None
+        self._case_errors = None
+        self._case_epsilon = None
 
     @staticmethod
     def _epsilon_from_mad(error_matrix: np.ndarray):
         return np.apply_along_axis(median_absolute_deviation, 0, error_matrix)
 
-    def _select_with_stream(self, population: Population, cases: CaseStream) -> Individual:
-        candidates = one_individual_per_error_vector(population)
+    def _given_epsilon(self):
+        return self.epsilon
 
+    def _prepare(self, population: Population):
+        if population.version == self._population_version:
+            return
+        error_matrix = population.all_error_vectors()
         ep = self.epsilon
-        if isinstance(ep, bool) and ep:
-            ep = self._epsilon_from_mad(population.all_error_vectors())
-
-        for case in cases:
-            if len(candidates) <= 1:
-                break
-
-            errors_this_case = [i.error_vector[case] for i in candidates]
-            best_val_for_case = min(errors_this_case)
-
-            max_error = best_val_for_case
-            if isinstance(ep, np.ndarray):
-                max_error += ep[case]
-            elif isinstance(ep, (float, int, np.int64, np.float64)):
-                max_error += ep
-
-            candidates = [i for i in candidates if i.error_vector[case] <= max_error]
-        return choice(candidates)
+        if isinstance(ep, bool):
+            ep = self._epsilon_from_mad(error_matrix) if ep else 0.0
+        else:
+            ep = self._given_epsilon()
+        self._population_version = population.version
+        self._groups, self._case_errors = group_error_vectors(error_matrix)
+        self._case_epsilon = ep
 
     def select_one(self, population: Population) -> Individual:
         """Return single individual from population.
@@ -277,8 +460,7 @@ class Lexicase(SimpleMultiSelectorMixin, Selector):
         Individual
             The selected Individual.
         """
-        cases = CaseStream(len(population[0].error_vector))
-        return self._select_with_stream(population, cases)
+        return self.select(population)[0]
 
     @tap
     def select(self, population: Population, n: int = 1) -> Sequence[Individual]:
@@ -297,7 +479,87 @@ class Lexicase(SimpleMultiSelectorMixin, Selector):
             The selected Individuals.
 
         """
-        return super().select(population, n)
+        self._prepare(population)
+        selected_ndxs = lexicase_select_groups(
+            self._groups, self._case_errors, n, self._case_epsilon, self.random_state
+        )
+        return [population[ndx] for ndx in selected_ndxs]
+
+
+class DownsampledLexicase(Lexicase):
+    """Lexicase selection over a random subset of the training cases.
+
+    Each generation, the search evaluates the population on a new random subset
+    of the training cases, drawn by ``sample_cases``, and lexicase selection
+    only filters on those cases. The search re-evaluates its best individuals
+    on all cases before accepting them as solutions.
+
+    See: https://dl.acm.org/doi/10.1145/3321707.3321875
+
+    Parameters
+    ----------
+    downsample_rate : float, optional
+        Proportion of the training cases drawn each generation. Default is 0.25.
+    epsilon : Union[bool, float, np.ndarray], optional
+        If True, the epsilon of each case is the median absolute deviation of
+        the population's errors on the sampled cases. A number is used as the
+        epsilon directly. An array gives one epsilon per error of the full
+        training set, and only the epsilons of the sampled cases are used.
+        Default is False.
+    seed : int, optional
+        Seed of the selector's own random state. Default is None, which uses
+        the global numpy random state.
+
+    """
+
+    def __init__(self,
+                 downsample_rate: float = 0.25,
+                 epsilon: Union[bool, float, np.ndarray] = False,
+                 seed: Optional[int] = None):
+        if not 0.0 < downsample_rate <= 1.0:
+            raise ValueError("downsample_rate must be in (0, 1]. Got {r}.".format(r=downsample_rate))
+        super().__init__(epsilon=epsilon, seed=seed)
+        self.downsample_rate = downsample_rate
+        # The cases drawn by the last call to sample_cases, on which the population is evaluated.
+        self._n_cases = None
+        self._case_indices = None
+
+    def _given_epsilon(self):
+        ep = self.epsilon
+        if np.ndim(ep) == 0 or self._case_indices is None:
+            return ep
+        ep = np.asarray(ep)
+        if len(ep) % self._n_cases != 0:
+            raise ValueError("epsilon has {e} values, which is not a multiple of the {n} training cases.".format(
+                e=len(ep),
+                n=self._n_cases
+            ))
+        # Errors are ordered by case, then by output.
+        return ep.reshape(self._n_cases, -1)[self._case_indices].ravel()
+
+    def sample_cases(self, n_cases: Optional[int]) -> Optional[np.ndarray]:
+        """Return the sorted indices of a random subset of the training cases.
+
+        Parameters
+        ----------
+        n_cases : Optional[int]
+            The number of training cases of the evaluator, or None if unknown.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Sorted indices of ``downsample_rate`` of the training cases, at
+            least one, or None if ``n_cases`` is unknown.
+
+        """
+        if n_cases is None:
+            self._n_cases = self._case_indices = None
+            return None
+        rng = np.random if self.random_state is None else self.random_state
+        n_sampled = max(1, int(round(self.downsample_rate * n_cases)))
+        self._n_cases = n_cases
+        self._case_indices = np.sort(rng.choice(n_cases, n_sampled, replace=False))
+        return self._case_indices
 
 
 class Elite(Selector):
@@ -339,6 +601,15 @@ class Elite(Selector):
         super().select(population, n)
         return population.best_n(n)
 
+    def select_parents(self, population: Population, n_children: int, num_parents: int) -> List[Sequence[Individual]]:
+        """Return the best ``num_parents`` individuals as the parents of every child."""
+        parents = self.select(population, num_parents)
+        return [parents] * n_children
+
+    def selectable_count(self, population_size: int, n: int = 1) -> Optional[int]:
+        """Return how many of the best individuals can be selected."""
+        return n
+
 
 def get_selector(name: str, **kwargs) -> Selector:
     """Get the selector class with the given name."""
@@ -347,6 +618,7 @@ def get_selector(name: str, **kwargs) -> Selector:
         "tournament": Tournament,
         "lexicase": Lexicase,
         "epsilon-lexicase": Lexicase(epsilon=True),
+        "downsampled-lexicase": DownsampledLexicase,
         "elite": Elite,
     }
     selector = name_to_cls.get(name, None)
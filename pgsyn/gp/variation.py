@@ -10,11 +10,12 @@ from abc import ABC, abstractmethod
 from typing import Sequence, Union
 import math
 
+import numpy as np
 from numpy.random import random, choice, randint
 
 from pgsyn.push.types import PushType
 from pgsyn.push.atoms import Literal
-from pgsyn.gp.genome import Genome, GeneSpawner
+from pgsyn.gp.genome import Genome, CompactGenome, GeneTable, GeneSpawner
 from pgsyn.knowledge.base import KnowledgeArchive
 from pgsyn.tap import tap
 from pgsyn.utils import DiscreteProbDistrib, instantiate_using
@@ -71,7 +72,27 @@ class VariationOperator(ABC):
         pass
 
     def produce(self, parents: Sequence[Genome], spawner: GeneSpawner, **kwargs) -> Genome:
+        """Produce a child Genome from parent Genomes and optional GenomeSpawner.
+
+        The child of ``CompactGenome`` parents is a CompactGenome of the same
+        table. An operator without parents produces a CompactGenome of the
+        spawner's ``gene_table`` if the ``compact`` keyword argument is True.
+
+        Parameters
+        ----------
+        parents
+            A list of parent Genomes given to the operator.
+        spawner
+            A GeneSpawner that can be used to produce new genes (aka Atoms).
+
+        """
         new_genome = self._produce(parents, spawner, **kwargs)
+        if not isinstance(new_genome, CompactGenome):
+            # Operators without a compact implementation build a Genome of Atoms.
+            if len(parents) > 0 and isinstance(parents[0], CompactGenome):
+                new_genome = parents[0].table.encode(new_genome)
+            elif len(parents) == 0 and kwargs.get("compact"):
+                new_genome = spawner.gene_table.encode(new_genome)
         max_genome_size = kwargs.get("max_genome_size")
         if max_genome_size:
             new_genome = new_genome[:max_genome_size]
@@ -159,6 +180,13 @@ def _gaussian_noise_factor():
     return math.sqrt(-2.0 * math.log(random())) * math.cos(2.0 * math.pi * random())
 
 
+def _spawn_codes(spawner: GeneSpawner, table: GeneTable, n: int) -> np.ndarray:
+    """Return the codes in ``table`` of ``n`` random genes."""
+    if table is spawner.gene_table:
+        return spawner.spawn_gene_codes(n)
+    return table.codes_of(spawner.spawn_genes(n))
+
+
 # Mutations
 
 # @TODO: Implement all the common literal mutations.
@@ -255,6 +283,9 @@ class DeletionMutation(VariationOperator):
         """
         super()._produce(parents, spawner, **kwargs)
         self.checknum_parents(parents)
+        if isinstance(parents[0], CompactGenome):
+            parent = parents[0]
+            return CompactGenome(parent.genes[random(len(parent)) >= self.rate], parent.table)
         new_genome = Genome()
         for gene in parents[0]:
             if random() < self.rate:
@@ -301,12 +332,100 @@ class AdditionMutation(VariationOperator):
         """
         super()._produce(parents, spawner, **kwargs)
         self.checknum_parents(parents)
-        new_genome = Genome()
-        for gene in parents[0]:
-            if random() < self.rate:
-                new_genome = new_genome.append(spawner.random_gene())
-            new_genome = new_genome.append(gene)
-        return new_genome
+        parent = parents[0]
+        added = random(len(parent)) < self.rate
+        n_added = int(np.count_nonzero(added))
+        if isinstance(parent, CompactGenome):
+            # Position of each parent gene once the new genes are inserted before them.
+            parent_pos = np.arange(len(parent)) + np.cumsum(added)
+            codes = np.empty(len(parent) + n_added, dtype=np.int32)
+            is_new = np.ones(len(codes), dtype=bool)
+            is_new[parent_pos] = False
+            codes[parent_pos] = parent.genes
+            codes[is_new] = _spawn_codes(spawner, parent.table, n_added)
+            return CompactGenome(codes, parent.table)
+        new_genes = iter(spawner.spawn_genes(n_added))
+        child = []
+        for gene, add in zip(parent, added.tolist()):
+            if add:
+                child.append(next(new_genes))
+            child.append(gene)
+        return Genome(child)
+
+
+class UMADMutation(VariationOperator):
+    """Uniform mutation by addition and deletion in a single pass.
+
+    Produces children distributed the same way as a ``VariationPipeline`` of
+    an ``AdditionMutation`` followed by a ``DeletionMutation``. A new gene is
+    added before each gene of the parent with probability ``addition_rate``,
+    then each gene of the result, added or not, is removed with probability
+    ``deletion_rate``. Both masks are drawn for the whole genome at once, only
+    the added genes that survive deletion are spawned, in one batch, and the
+    child is built in one construction. Children of a ``CompactGenome`` are built from its
+    codes with array indexing.
+
+    Parameters
+    ----------
+    addition_rate : float
+        The probability of adding a new Atom at any given point in the parent
+        Genome. Default is 0.09.
+    deletion_rate : float
+        The probability of removing any given Atom after the additions.
+        Default is 0.0826.
+
+    Attributes
+    ----------
+    addition_rate : float
+        The probability of adding a new Atom at any given point in the parent
+        Genome.
+    deletion_rate : float
+        The probability of removing any given Atom after the additions.
+    num_parents : int
+        Number of parent Genomes the operator needs to produce a child
+        Individual.
+
+    """
+
+    def __init__(self, addition_rate: float = 0.09, deletion_rate: float = 0.0826):
+        super().__init__(1)
+        self.addition_rate = addition_rate
+        self.deletion_rate = deletion_rate
+
+    @tap
+    def _produce(self, parents: Sequence[Genome], spawner: GeneSpawner, **kwargs) -> Genome:
+        """Produce a child Genome from parent Genomes and optional GenomeSpawner.
+
+        Parameters
+        ----------
+        parents
+            A list of parent Genomes given to the operator.
+        spawner
+            A GeneSpawner that can be used to produce new genes (aka Atoms).
+
+        """
+        super()._produce(parents, spawner, **kwargs)
+        self.checknum_parents(parents)
+        parent = parents[0]
+        n = len(parent)
+        added = random(n) < self.addition_rate
+        n_added = int(np.count_nonzero(added))
+        # Position of each parent gene once the new genes are inserted before them.
+        parent_pos = np.arange(n) + np.cumsum(added)
+        # Non-negative sources are parent genes, negative sources are new genes.
+        source = np.full(n + n_added, -1)
+        source[parent_pos] = np.arange(n)
+        source = source[random(n + n_added) >= self.deletion_rate]
+        is_new = source < 0
+        n_new = int(np.count_nonzero(is_new))
+        if isinstance(parent, CompactGenome):
+            codes = np.empty(len(source), dtype=np.int32)
+            codes[~is_new] = parent.genes[source[~is_new]]
+            codes[is_new] = _spawn_codes(spawner, parent.table, n_new)
+            return CompactGenome(codes, parent.table)
+        new_genes = iter(spawner.spawn_genes(n_new))
+        genes = list(parent)
+        return Genome([genes[ndx] if ndx >= 0 else next(new_genes) for ndx in source.tolist()])
 
 
 class InsertionMutation(VariationOperator):
@@ -520,7 +639,7 @@ class Genesis(VariationOperator):
 
         """
         super()._produce(parents, spawner, **kwargs)
-        return spawner.spawn_genome(self.size)
+        return spawner.spawn_genome(self.size, compact=kwargs.get("compact", False))
 
 
 class Cloning(VariationOperator):
@@ -564,7 +683,8 @@ def get_variation_operator(name: str, **kwargs) -> VariationOperator:
         # UMAD citation: https://dl.acm.org/citation.cfm?id=3205455.3205603
         "umad": VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.0826)]),
         "umad-shrink": VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.1)]),
-        "umad-grow": VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.0652)])
+        "umad-grow": VariationPipeline([AdditionMutation(0.09), DeletionMutation(0.0652)]),
+        "umad-fused": UMADMutation(0.09, 0.0826)
     }
     op = name_to_cls.get(name, None)
     if op is None:
@@ -11,33 +11,34 @@ import numpy as np
 from numpy.random import randint
 
 from pgsyn.gp.genome import Genome
-from pgsyn.push.atoms import Closer, Input, InstructionMeta
+from pgsyn.push.atoms import Closer, Input, InstructionMeta, intern_atom
 from pgsyn.push.type_library import PushTypeLibrary, infer_literal
 from pgsyn.push.types import BoolVector, Char, CharVector, FloatVector, IntVector, StrVector
 
 
 def from_yaml(yml: Sequence):
-    genome = Genome()
+    type_library = PushTypeLibrary()
+    genes = []
     for item in yml:
         if isinstance(item, (Closer, InstructionMeta, Input)):
-            gene = item
+            gene = intern_atom(item)
         elif isinstance(item, (str, int, float, bool, Char)):
-            gene = infer_literal(val=item, type_library=PushTypeLibrary())
+            gene = infer_literal(val=item, type_library=type_library)
         elif isinstance(item, Sequence):
             if all([isinstance(sub_item, int) for sub_item in item]):
-                gene = infer_literal(val=IntVector(item), type_library=PushTypeLibrary())
+                gene = infer_literal(val=IntVector(item), type_library=type_library)
             elif all([isinstance(sub_item, bool) for sub_item in item]):
-                gene = infer_literal(val=BoolVector(item), type_library=PushTypeLibrary())
+                gene = infer_literal(val=BoolVector(item), type_library=type_library)
             elif all([isinstance(sub_item, float) for sub_item in item]):
-                gene = infer_literal(val=FloatVector(item), type_library=PushTypeLibrary())
+                gene = infer_literal(val=FloatVector(item), type_library=type_library)
             elif all([isinstance(sub_item, Char) for sub_item in item]):
-                gene = infer_literal(val=CharVector(item), type_library=PushTypeLibrary())
+                gene = infer_literal(val=CharVector(item), type_library=type_library)
             elif all([isinstance(sub_item, str) for sub_item in item]):
-                gene = infer_literal(val=StrVector(item), type_library=PushTypeLibrary())
+                gene = infer_literal(val=StrVector(item), type_library=type_library)
             else:
                 raise Exception(f"Cannot find PushType for token {item}.")
-        genome = genome.append(gene)
-    return genome
+        genes.append(gene)
+    return Genome(genes)
 
 
 class KnowledgeArchive:
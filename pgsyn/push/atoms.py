@@ -31,6 +31,9 @@ class Closer(Atom, PClass):
 
     yaml_tag = u"!closer"
 
+    def __reduce__(self):
+        return intern_closer, ()
+
     def pretty_str(self) -> str:
         """Generate a simple string representation of the Atom."""
         return "close"
@@ -85,6 +88,9 @@ class InstructionMeta(Atom, PClass):
     name = field(type=str, mandatory=True)
     code_blocks = field(type=int, mandatory=True)
 
+    def __reduce__(self):
+        return intern_instruction_meta, (self.name, self.code_blocks)
+
     def pretty_str(self) -> str:
         """Generate a simple string representation of the Instruction."""
         return self.name
@@ -104,11 +110,57 @@ class Input(Atom, PClass):
 
     input_index = field(type=int, mandatory=True)
 
+    def __reduce__(self):
+        return intern_input, (self.input_index,)
+
     def pretty_str(self) -> str:
         """Generate a simple string representation of the Input."""
         return "input_" + str(self.input_index)
 
 
+# Shared instances of the Closer, InstructionMeta and Input atoms. These atoms are
+# immutable and make up most genes, so genomes can hold the same few objects.
+# Unpickled atoms are looked up here too, so worker processes share them as well.
+_interned_atoms = {}
+
+
+def intern_closer() -> Closer:
+    """Return the shared ``Closer``."""
+    atom = _interned_atoms.get(Closer)
+    if atom is None:
+        atom = _interned_atoms[Closer] = Closer()
+    return atom
+
+
+def intern_instruction_meta(name: str, code_blocks: int) -> InstructionMeta:
+    """Return the shared ``InstructionMeta`` with the given name and number of code blocks."""
+    key = (InstructionMeta, name, code_blocks)
+    atom = _interned_atoms.get(key)
+    if atom is None:
+        atom = _interned_atoms[key] = InstructionMeta(name=name, code_blocks=code_blocks)
+    return atom
+
+
+def intern_input(input_index: int) -> Input:
+    """Return the shared ``Input`` of the given index."""
+    key = (Input, input_index)
+    atom = _interned_atoms.get(key)
+    if atom is None:
+        atom = _interned_atoms[key] = Input(input_index=input_index)
+    return atom
+
+
+def intern_atom(atom: Atom) -> Atom:
+    """Return the shared instance equal to the atom, or the atom itself if it is not interned."""
+    if isinstance(atom, Closer):
+        return intern_closer()
+    if isinstance(atom, InstructionMeta):
+        return intern_instruction_meta(atom.name, atom.code_blocks)
+    if isinstance(atom, Input):
+        return intern_input(atom.input_index)
+    return atom
+
+
 class CodeBlock(Atom, CheckedPVector):
     """An `Atom` which holds a sequence of other atoms in order to express a nested code block."""
 
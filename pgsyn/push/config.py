@@ -6,7 +6,7 @@ LastEditTime: 2022-02-18 16:34:26
 '''
 
 
-from collections import Sequence
+from collections.abc import Sequence
 from typing import Union
 
 from pyrsistent import PRecord, field
@@ -9,7 +9,7 @@ LastEditTime: 2022-02-18 16:34:58
 from abc import ABC, abstractmethod
 from typing import Callable, Set, Sequence
 
-from pgsyn.push.atoms import InstructionMeta
+from pgsyn.push.atoms import InstructionMeta, intern_instruction_meta
 from pgsyn.push.config import PushConfig
 from pgsyn.push.type_library import RESERVED_PSEUDO_STACKS
 from pgsyn.push.state import PushState
@@ -76,7 +76,7 @@ class Instruction(ABC):
 
     def meta(self) -> InstructionMeta:
         """Create an ``InstructionMeta`` from the instruction object."""
-        return InstructionMeta(name=self.name, code_blocks=self.code_blocks)
+        return intern_instruction_meta(self.name, self.code_blocks)
 
     def __eq__(self, other):
         if type(self) == type(other):
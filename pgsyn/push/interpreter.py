@@ -7,7 +7,7 @@ LastEditTime: 2022-02-18 16:35:40
 
 
 import traceback
-from typing import Union
+from typing import Union, Sequence, List
 import time
 from enum import Enum
 
@@ -38,6 +38,13 @@ class PushInterpreter:
     instruction_set : Union[InstructionSet, str], optional
         The ``InstructionSet`` to use for executing programs. Default is "core"
         which instantiates an ``InstructionSet`` using all the core instructions.
+    reset_on_run : bool, optional
+        If True, every run starts from an empty ``PushState``. Default is True.
+    recycle_state : bool, optional
+        If True, runs that start from an empty ``PushState`` reset the state of
+        the previous run in place instead of building a new one, as long as it
+        was built for the same configuration. A state returned by an earlier
+        run is then changed by the next run. Default is True.
 
     Attributes
     ----------
@@ -49,13 +56,17 @@ class PushInterpreter:
     status : PushInterpreterStatus
         A string denoting if the interpreter has encountered a situation
         where non-standard termination was required.
+    batch_status : List[PushInterpreterStatus]
+        The status of each case of the most recent ``run_batch``.
 
     """
 
     def __init__(self,
                  instruction_set: Union[InstructionSet, str] = "core",
-                 reset_on_run: bool = True):
+                 reset_on_run: bool = True,
+                 recycle_state: bool = True):
         self.reset_on_run = reset_on_run
+        self.recycle_state = recycle_state
         # If no instruction set given, create one and register all instructions.
         if instruction_set == "core":
             self.instruction_set = InstructionSet(register_core=True)
@@ -67,6 +78,8 @@ class PushInterpreter:
         # Initialize the PushState and status
         self.state: PushState = None
         self.status: PushInterpreterStatus = None
+        self.batch_status: List[PushInterpreterStatus] = []
+        self._batch_states: List[PushState] = []
         self._validate()
 
     def _validate(self):
@@ -118,7 +131,8 @@ class PushInterpreter:
                 raise PushError("Closers should not be in push programs. Only genomes.")
             else:
                 raise PushError("Cannot evaluate {t}, require a subclass of Atom".format(t=type(atom)))
-            self.untyped_to_typed()
+            if self.state.untyped:
+                self.untyped_to_typed()
         except Exception as e:
             err_type = type(e)
             err_msg = str(e)
@@ -130,6 +144,12 @@ class PushInterpreter:
                     m=err_msg
                 ))
 
+    def _can_recycle_state(self, state: PushState, push_config: PushConfig) -> bool:
+        return (
+            len(state) == len(self.type_library)
+            and (state.push_config is push_config or state.push_config == push_config)
+        )
+
     @tap
     def run(self,
             program: Program,
@@ -162,14 +182,22 @@ class PushInterpreter:
         """
         push_config = program.signature.push_config
 
-        if self.reset_on_run or self.state is None:
+        if self.state is None:
             self.state = PushState(self.type_library, push_config)
             self.status = PushInterpreterStatus.normal
+        elif self.reset_on_run:
+            if self.recycle_state and self._can_recycle_state(self.state, push_config):
+                self.state.reset()
+            else:
+                self.state = PushState(self.type_library, push_config)
+            self.status = PushInterpreterStatus.normal
 
         # Setup
         self.state.load_code(program.code)
         self.state.load_inputs(inputs)
-        stop_time = time.time() + push_config.runtime_limit
+        stop_time = time.monotonic() + push_config.runtime_limit
+        step_limit = push_config.step_limit
+        growth_cap = push_config.growth_cap
         steps = 0
 
         if print_trace:
@@ -179,10 +207,10 @@ class PushInterpreter:
         # Iterate atom evaluation until entire program is evaluated.
         while len(self.state["exec"]) > 0:
             # Stopping conditions
-            if steps > push_config.step_limit:
+            if steps > step_limit:
                 self.status = PushInterpreterStatus.step_limit_exceeded
                 break
-            if time.time() > stop_time:
+            if time.monotonic() > stop_time:
                 self.status = PushInterpreterStatus.runtime_limit_exceeded
                 break
 
@@ -196,7 +224,7 @@ class PushInterpreter:
             # Evaluate atom.
             old_size = self.state.size()
             self.evaluate_atom(next_atom, push_config)
-            if self.state.size() > old_size + push_config.growth_cap:
+            if self.state.size() > old_size + growth_cap:
                 self.status = PushInterpreterStatus.growth_cap_exceeded
                 break
 
@@ -211,3 +239,104 @@ class PushInterpreter:
             print("Finished program evaluation.")
 
         return self.state.observe_stacks(program.signature.output_stacks)
+
+    def _states_for_batch(self, n_cases: int, push_config: PushConfig) -> List[PushState]:
+        states = []
+        reusable = (self.recycle_state and len(self._batch_states) > 0
+                    and self._can_recycle_state(self._batch_states[0], push_config))
+        if reusable:
+            states = self._batch_states[:n_cases]
+        else:
+            self._batch_states = []
+        for state in states:
+            state.reset()
+        states += [PushState(self.type_library, push_config) for _ in range(n_cases - len(states))]
+        if self.recycle_state:
+            self._batch_states = states + self._batch_states[len(states):]
+        return states
+
+    @tap
+    def run_batch(self, program: Program, inputs_batch: Sequence[list]) -> List[list]:
+        """Run a Push ``Program`` on several inputs in lock-step.
+
+        Each set of inputs gets its own empty ``PushState``. At every step, one
+        atom is evaluated on each state which still has atoms on its exec stack
+        and has not hit a limit.
+
+        The outputs are identical to calling ``run`` on each set of inputs,
+        unless the runtime limit is hit. The differences are:
+
+            - The runtime limit is not applied per case. The batch shares one
+              deadline of the runtime limit times the number of cases, the most
+              that running the cases one by one could take, and stops all
+              unfinished cases when it runs out.
+            - Taps registered on ``run`` are not called. Taps registered on
+              ``run_batch`` are called once for the whole batch.
+
+        If ``reset_on_run`` is False, each case must start from the state left
+        by the previous one, so the cases are run one by one with ``run``.
+
+        Parameters
+        ----------
+        program : Program
+            Program to run.
+        inputs_batch : Sequence[list]
+            One sequence of input values per case.
+
+        Returns
+        -------
+        List[list]
+            The outputs of each case, in the order of ``inputs_batch``.
+
+        """
+        if not self.reset_on_run:
+            self.batch_status = []
+            outputs = []
+            for inputs in inputs_batch:
+                outputs.append(self.run(program, inputs))
+                self.batch_status.append(self.status)
+            return outputs
+
+        push_config = program.signature.push_config
+        states = self._states_for_batch(len(inputs_batch), push_config)
+        for state, inputs in zip(states, inputs_batch):
+            state.load_code(program.code)
+            state.load_inputs(inputs)
+        self.batch_status = [PushInterpreterStatus.normal] * len(states)
+
+        stop_time = time.monotonic() + push_config.runtime_limit * len(states)
+        step_limit = push_config.step_limit
+        growth_cap = push_config.growth_cap
+        steps = 0
+
+        active = [lane for lane, state in enumerate(states) if len(state["exec"]) > 0]
+        while len(active) > 0:
+            # Stopping conditions shared by all cases
+            if steps > step_limit:
+                for lane in active:
+                    self.batch_status[lane] = PushInterpreterStatus.step_limit_exceeded
+                break
+            if time.monotonic() > stop_time:
+                for lane in active:
+                    self.batch_status[lane] = PushInterpreterStatus.runtime_limit_exceeded
+                break
+
+            still_active = []
+            for lane in active:
+                self.state = states[lane]
+                next_atom = self.state["exec"].pop()
+                old_size = self.state.size()
+                self.evaluate_atom(next_atom, push_config)
+                states[lane] = self.state
+                if self.state.size() > old_size + growth_cap:
+                    self.batch_status[lane] = PushInterpreterStatus.growth_cap_exceeded
+                elif len(self.state["exec"]) > 0:
+                    still_active.append(lane)
+            active = still_active
+            steps += 1
+
+        if len(states) > 0:
+            self.state = states[-1]
+            self.status = self.batch_status[-1]
+        output_stacks = program.signature.output_stacks
+        return [state.observe_stacks(output_stacks) for state in states]
@@ -6,7 +6,8 @@ LastEditTime: 2022-02-18 16:36:16
 '''
 
 
-from typing import Optional, List
+from functools import partial
+from typing import Any, Callable, Optional, List
 
 from pgsyn.push.config import constrain_collection, constrain_number, PushConfig
 from pgsyn.push.types import PushType
@@ -14,6 +15,76 @@ from pgsyn.utils import Token
 from pgsyn.validation import PushError
 
 
+def _is_bounded_number(exact_types: frozenset, limit: float, value) -> bool:
+    return type(value) in exact_types and -limit <= value <= limit
+
+
+def _is_bounded_collection(exact_types: frozenset, cap: int, value) -> bool:
+    return type(value) in exact_types and len(value) <= cap
+
+
+def _is_never_storable(value) -> bool:
+    return False
+
+
+def storable_check(push_type: PushType, push_config: PushConfig) -> Callable[[Any], bool]:
+    """Return a predicate telling if a value can be stored on a stack as is.
+
+    A value passing the predicate is left unchanged by the coercion and
+    constraints of ``PushStack``, so pushing it only needs an append. Values
+    failing it take the full coercion path.
+
+    Parameters
+    ----------
+    push_type : PushType
+        The PushType of the stack.
+    push_config : PushConfig
+        The configuration of the Push program being run.
+
+    Returns
+    -------
+    Callable[[Any], bool]
+        The predicate.
+
+    """
+    if type(push_type).is_instance is not PushType.is_instance:
+        # Custom type checks may depend on more than the Python type.
+        if push_type.is_numeric or push_type.is_collection:
+            return _is_never_storable
+        return push_type.is_instance
+    exact_types = frozenset(push_type.python_types)
+    if push_type.is_numeric and push_type.is_collection:
+        return _is_never_storable
+    elif push_type.is_numeric:
+        return partial(_is_bounded_number, exact_types, push_config.numeric_magnitude_limit)
+    elif push_type.is_collection:
+        return partial(_is_bounded_collection, exact_types, push_config.collection_size_cap)
+    return push_type.is_instance
+
+
+class StackSizeCounter:
+    """Running count of the items held by a group of PushStacks.
+
+    Attributes
+    ----------
+    count : int
+        The number of items on all stacks sharing the counter.
+
+    """
+
+    __slots__ = ["count"]
+
+    def __init__(self):
+        self.count = 0
+
+
+def _restore_stack(push_type: PushType, push_config: PushConfig, items: list, size_counter: StackSizeCounter):
+    stack = PushStack(push_type, push_config, size_counter)
+    # The counter already includes the items.
+    list.extend(stack, items)
+    return stack
+
+
 class PushStack(List):
     """Stack that holds elements of a single ``PushType``.
 
@@ -30,15 +101,30 @@ class PushStack(List):
         The PushType all items of the stack should conform to.
     push_config : PushConfig
         The configuration of the Push program being run.
+    size_counter : StackSizeCounter, optional
+        Counter updated by every change to the number of items on the stack.
+        A PushState shares one counter between all its stacks. Default is None,
+        which creates a counter for this stack only.
+
+    Notes
+    -----
+    Values that are already of one of the stack's Python types and within the
+    limits of the configuration are stored without coercion. The check for
+    this is chosen once per stack by ``storable_check``.
+
+    All methods that add or remove items keep ``size_counter`` up to date,
+    including the plain ``list`` methods.
 
     """
 
-    __slots__ = ["push_type", "push_config"]
+    __slots__ = ["push_type", "push_config", "size_counter", "_is_storable"]
 
-    def __init__(self, push_type: PushType, push_config: PushConfig):
+    def __init__(self, push_type: PushType, push_config: PushConfig, size_counter: Optional[StackSizeCounter] = None):
         super().__init__()
         self.push_type = push_type
         self.push_config = push_config
+        self.size_counter = StackSizeCounter() if size_counter is None else size_counter
+        self._is_storable = storable_check(push_type, push_config)
 
     def is_empty(self) -> bool:
         """Return True if the stack is empty. Return False otherwise."""
@@ -73,7 +159,10 @@ class PushStack(List):
             Value to push onto stack.
 
         """
-        self.append(self._coerce(value))
+        if not self._is_storable(value):
+            value = self._coerce(value)
+        list.append(self, value)
+        self.size_counter.count += 1
         return self
 
     def pop(self, index: Optional[int] = None):
@@ -90,9 +179,11 @@ class PushStack(List):
 
         """
         if index is None:
-            return super().pop()
+            item = list.pop(self)
         else:
-            return super().pop((len(self) - 1) - index)
+            item = list.pop(self, (len(self) - 1) - index)
+        self.size_counter.count -= 1
+        return item
 
     def nth(self, position: int):
         """Return the element at a given position.
@@ -161,8 +252,10 @@ class PushStack(List):
             Value to insert into stack.
 
         """
-        value = self._coerce(value)
-        super().insert(len(self) - position, value)
+        if not self._is_storable(value):
+            value = self._coerce(value)
+        list.insert(self, len(self) - position, value)
+        self.size_counter.count += 1
         return self
 
     def set_nth(self, position: int, value):
@@ -176,15 +269,56 @@ class PushStack(List):
             Value to insert into stack.
 
         """
-        value = self._coerce(value)
+        if not self._is_storable(value):
+            value = self._coerce(value)
         self[len(self) - 1 - position] = value
         return self
 
     def flush(self):
         """Empty the stack."""
-        del self[:]
+        self.size_counter.count -= len(self)
+        list.clear(self)
+        return self
+
+    def append(self, value):
+        list.append(self, value)
+        self.size_counter.count += 1
+
+    def extend(self, values):
+        size = len(self)
+        list.extend(self, values)
+        self.size_counter.count += len(self) - size
+
+    def remove(self, value):
+        list.remove(self, value)
+        self.size_counter.count -= 1
+
+    def clear(self):
+        self.flush()
+
+    def __setitem__(self, key, value):
+        size = len(self)
+        list.__setitem__(self, key, value)
+        self.size_counter.count += len(self) - size
+
+    def __delitem__(self, key):
+        size = len(self)
+        list.__delitem__(self, key)
+        self.size_counter.count += len(self) - size
+
+    def __iadd__(self, values):
+        self.extend(values)
         return self
 
+    def __imul__(self, n):
+        size = len(self)
+        list.__imul__(self, n)
+        self.size_counter.count += len(self) - size
+        return self
+
+    def __reduce__(self):
+        return _restore_stack, (self.push_type, self.push_config, list(self), self.size_counter)
+
     def __repr__(self):
         self_r = list(self)[::-1]
         return self_r.__repr__()
@@ -13,14 +13,14 @@ import numpy as np
 from pgsyn.push.config import PushConfig
 from pgsyn.push.type_library import PushTypeLibrary
 from pgsyn.push.atoms import CodeBlock
-from pgsyn.push.stack import PushStack
+from pgsyn.push.stack import PushStack, StackSizeCounter
 from pgsyn.utils import Token
 
 
 class PushState(dict):
     """A collection of PushStacks used during push program execution."""
 
-    __slots__ = ["stdout", "inputs", "untyped", "type_library", "push_config"]
+    __slots__ = ["stdout", "inputs", "untyped", "type_library", "push_config", "size_counter"]
 
     def __init__(self, type_library: PushTypeLibrary, push_config: PushConfig):
         super().__init__()
@@ -29,9 +29,10 @@ class PushState(dict):
         self.untyped = deque([])
         self.type_library = type_library
         self.push_config = push_config
+        self.size_counter = StackSizeCounter()
 
         for name, push_type in type_library.items():
-            self[name] = PushStack(push_type, push_config)
+            self[name] = PushStack(push_type, push_config, self.size_counter)
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, PushState):
@@ -75,6 +76,15 @@ class PushState(dict):
         state.stdout = stdout
         return state
 
+    def reset(self):
+        """Empty every stack, the untyped queue, the inputs and stdout in place."""
+        for stack in self.values():
+            if stack:
+                stack.flush()
+        self.untyped.clear()
+        self.inputs = []
+        self.stdout = ""
+
     def load_code(self, program: CodeBlock):
         """Push the given CodeBlock to the execution stack."""
         self["exec"].push(program)
@@ -85,10 +95,10 @@ class PushState(dict):
         Parameters
         ----------
         inputs : list
-            List of input values.
+            List (or tuple) of input values.
 
         """
-        if not isinstance(inputs, (list, np.ndarray)):
+        if not isinstance(inputs, (list, tuple, np.ndarray)):
             raise ValueError(
                 "Push inputs must be a list, got {t}".format(t=type(inputs)))
         self.inputs = inputs
@@ -143,8 +153,13 @@ class PushState(dict):
                 self[typ].push(val)
 
     def size(self):
-        """Return the size of the PushState."""
-        return sum([len(s) for s in self.values()]) + len(self.inputs)
+        """Return the size of the PushState.
+
+        The number of items on the stacks is tracked as they change, so this
+        does not depend on the number of stacks.
+
+        """
+        return self.size_counter.count + len(self.inputs)
 
     def pretty_print(self):
         """Print the state of all stacks in the PushState."""
@@ -33,10 +33,18 @@ class PushTypeLibrary(dict):
     *args
         A collection of PushTypes to register.
 
+    Notes
+    -----
+    The PushType found for each Python type is cached, so repeated lookups
+    are a single dict access. The caches are cleared by ``register`` and
+    ``unregister``; modifying the library as a plain dict bypasses them.
+
     """
 
     def __init__(self, register_core: bool = True, *args):
         super().__init__()
+        self._type_of_cache = {}
+        self._type_for_type_cache = {}
         if register_core:
             self.register_core()
         self.register_list(args)
@@ -63,6 +71,7 @@ class PushTypeLibrary(dict):
         if (not _force) and (name in RESERVED_PSEUDO_STACKS):
             raise ValueError("Cannot register PushType with name {nm} because it is reserved.".format(nm=name))
         self[name] = push_type
+        self._clear_caches()
         return self
 
     def create_and_register(self,
@@ -119,8 +128,13 @@ class PushTypeLibrary(dict):
         if push_type_name in RESERVED_PSEUDO_STACKS:
             raise ValueError("Cannot unregister PushType with name {nm} because it is reserved.".format(nm=push_type_name))
         self.pop(push_type_name, None)
+        self._clear_caches()
         return self
 
+    def _clear_caches(self):
+        self._type_of_cache.clear()
+        self._type_for_type_cache.clear()
+
     def register_list(self, list_of_push_types: Sequence[PushType]):
         """Register a list of PushType objects.
 
@@ -178,12 +192,28 @@ class PushTypeLibrary(dict):
             The corresponding PushType of the thing. If no corresponding type, returns None.
 
         """
+        typ = type(thing)
+        try:
+            push_type = self._type_of_cache[typ]
+        except KeyError:
+            push_type = self._scan_type_of(thing)
+        if push_type is None and error_on_not_found:
+            raise PushError.no_type(thing)
+        return push_type
+
+    def _scan_type_of(self, thing: Any) -> Optional[PushType]:
+        # The result only depends on the type of the thing unless a PushType
+        # overrides ``is_instance``, in which case it is not cached.
+        cacheable = True
+        found = None
         for push_type in self.values():
+            cacheable = cacheable and type(push_type).is_instance is PushType.is_instance
             if push_type.is_instance(thing):
-                return push_type
-        if error_on_not_found:
-            raise PushError.no_type(thing)
-        return None
+                found = push_type
+                break
+        if cacheable:
+            self._type_of_cache[type(thing)] = found
+        return found
 
     def push_type_for_type(self, typ: type, error_on_not_found: bool = False) -> Optional[PushType]:
         """Return the PushType of the given python (or numpy) type.
@@ -201,12 +231,14 @@ class PushTypeLibrary(dict):
             The corresponding PushType of the given type. If no corresponding type, returns None.
 
         """
-        for push_type in self.values():
-            if typ in push_type.python_types:
-                return push_type
-        if error_on_not_found:
+        try:
+            push_type = self._type_for_type_cache[typ]
+        except KeyError:
+            push_type = next((pt for pt in self.values() if typ in pt.python_types), None)
+            self._type_for_type_cache[typ] = push_type
+        if push_type is None and error_on_not_found:
             raise PushError.no_type(typ)
-        return None
+        return push_type
 
 
 def infer_literal(val: Any, type_library: PushTypeLibrary) -> Literal:
@@ -10,12 +10,13 @@ import csv
 import inspect
 import json
 import os
+import sys
 from datetime import datetime
 
 import numpy as np
 from abc import ABC
 from functools import wraps
-from typing import Dict, Sequence, Optional, MutableMapping, Tuple
+from typing import Callable, Dict, Sequence, Optional, MutableMapping, Tuple
 
 
 class Tap(ABC):
@@ -315,6 +316,39 @@ class StdOutSimplificationStep(Tap):
             ))
 
 
+class StdOutEvaluationCacheTap(Tap):
+    """A ``Tap`` that prints the hit rates of the evaluation caches after a population is evaluated.
+
+    Reports the evaluation cache passed to the population and, for serial
+    evaluation, the string distance memo of the evaluator. Pool workers keep
+    their own memos, which are not visible from the main process.
+
+    """
+
+    def post(self, id: str, args, kwargs, returned):
+        """Print the evaluation cache and string distance memo counters."""
+        cache = kwargs.get("cache")
+        if cache is not None:
+            print("EVALUATION CACHE: hits={h}, misses={m}, hit_rate={r:.3f}, size={s}".format(
+                h=cache.hits,
+                m=cache.misses,
+                r=cache.hit_rate(),
+                s=len(cache)
+            ))
+        if id != "pgsyn.gp.population.Population.evaluate":
+            # p_evaluate is given a Pool, whose workers keep their own memos.
+            return
+        evaluator = kwargs.get("evaluator", args[1] if len(args) > 1 else None)
+        memo = getattr(evaluator, "distance_memo", None)
+        if memo is not None:
+            print("STRING DISTANCE MEMO: hits={h}, misses={m}, hit_rate={r:.3f}, size={s}".format(
+                h=memo.hits,
+                m=memo.misses,
+                r=memo.hit_rate(),
+                s=len(memo)
+            ))
+
+
 class TapManager:
     """Stores a mapping of function ID to ``Tap`` object than can be used to inject side effects around functions.
 
@@ -325,9 +359,14 @@ class TapManager:
     of the module name the function is defined in (ie. ``my_package.my_module``) and the qualified name of the function
     definition (ie. ``MyClass.my_method``). The final function ID would be ``my_package.my_module.MyClass.my_method``.
 
+    Functions decorated with ``tap`` are only wrapped while a ``Tap`` is registered for them. Registering and
+    unregistering swaps the function bound in its module (or class) between the plain and the wrapped version, so
+    untapped functions run without any overhead.
+
     """
 
     _taps: MutableMapping[str, Tap] = {}
+    _tappable: MutableMapping[str, Callable] = {}
 
     # @todo multiple Taps per ID? CompositeTap type?
 
@@ -335,12 +374,14 @@ class TapManager:
     def register(id: str, tap: Tap):
         """Register a ``Tap`` to be performed when the function with the associated ID is called."""
         TapManager._taps[id] = tap
+        TapManager._rebind(id)
 
     @staticmethod
     def unregister(id: str):
         """Unregister the ``Tap`` associated with given ID."""
         if id in TapManager._taps:
             del TapManager._taps[id]
+            TapManager._rebind(id)
 
     @staticmethod
     def get(id: str) -> Optional[Tap]:
@@ -360,14 +401,22 @@ class TapManager:
         else:
             raise KeyError("No Tap registered in TapManager with id " + id)
 
+    @staticmethod
+    def _rebind(id: str):
+        # Functions defined after their Tap was registered are wrapped by ``tap`` directly.
+        fn = TapManager._tappable.get(id)
+        if fn is None:
+            return
+        owner = sys.modules[fn.__module__]
+        for name in fn.__qualname__.split(".")[:-1]:
+            owner = getattr(owner, name)
+        if id in TapManager._taps:
+            setattr(owner, fn.__name__, _wrap_with_tap(fn, id))
+        else:
+            setattr(owner, fn.__name__, fn)
 
-def tap(fn):
-    """Decorate a function/method to call any associated taps that have been registered in the ``TapManager``.
-
-    Functional behavior is not changed.
 
-    """
-    fn_id = inspect.getmodule(fn).__name__ + "." + fn.__qualname__
+def _wrap_with_tap(fn, fn_id: str):
 
     @wraps(fn)
     def tapped(*args, **kwargs):
@@ -382,6 +431,20 @@ def tap(fn):
     return tapped
 
 
+def tap(fn):
+    """Decorate a function/method to call any associated taps that have been registered in the ``TapManager``.
+
+    Functional behavior is not changed. The function is returned as is unless a ``Tap`` is already registered for it;
+    the ``TapManager`` wraps and unwraps it as taps are registered and unregistered.
+
+    """
+    fn_id = inspect.getmodule(fn).__name__ + "." + fn.__qualname__
+    TapManager._tappable[fn_id] = fn
+    if fn_id in TapManager._taps:
+        return _wrap_with_tap(fn, fn_id)
+    return fn
+
+
 def set_verbosity(level: int):
     """Register some ``Tap`` objects in the ``TapManger`` that print to stdout during an evolutionary run.
 
@@ -407,3 +470,7 @@ def set_verbosity(level: int):
                                                                               pre_print_atoms=True,
                                                                               post_print_best=True))
         TapManager.register("pgsyn.gp.genome.GenomeSimplifier._step", StdOutSimplificationStep())
+        TapManager.register("pgsyn.gp.genome.GenomeSimplifier._p_step", StdOutSimplificationStep())
+        TapManager.register("pgsyn.gp.genome.GenomeSimplifier._sweep_step", StdOutSimplificationStep())
+        TapManager.register("pgsyn.gp.population.Population.evaluate", StdOutEvaluationCacheTap())
+        TapManager.register("pgsyn.gp.population.Population.p_evaluate", StdOutEvaluationCacheTap())
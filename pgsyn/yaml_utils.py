@@ -5,20 +5,27 @@ LastEditors: He,Yifan
 LastEditTime: 2022-02-20 15:00:37
 '''
 
+from functools import lru_cache
+
 import yaml
 
-from pgsyn.push.atoms import Closer, Input, InstructionMeta
+from pgsyn.push.atoms import Closer, Input, InstructionMeta, intern_closer, intern_input, intern_instruction_meta
 from pgsyn.push.instructions import core_instructions
 from pgsyn.push.type_library import PushTypeLibrary
 from pgsyn.push.types import Char
 
+@lru_cache(maxsize=None)
+def _core_code_blocks():
+    # Number of code blocks of each core instruction, by name. Built once.
+    return {i.name: i.code_blocks for i in core_instructions(PushTypeLibrary())}
+
 def get_instruction_by_str(s: str):
-    for i in core_instructions(PushTypeLibrary()):
-        if s == i.name:
-            return InstructionMeta(name=i.name, code_blocks=i.code_blocks)
+    code_blocks = _core_code_blocks().get(s)
+    if code_blocks is not None:
+        return intern_instruction_meta(s, code_blocks)
 
 def closer_constructor(loader, node):
-    return Closer()
+    return intern_closer()
 
 def char_constructor(loader, node):
     char = loader.construct_scalar(node)
@@ -36,7 +43,7 @@ def instructionmeta_constructor(loader, node):
 
 def input_constructor(loader, node):
     input_index = int(loader.construct_scalar(node))
-    return Input(input_index=input_index)
+    return intern_input(input_index)
 
 def register_yaml_constructors():
     yaml.add_constructor(Closer.yaml_tag, closer_constructor)